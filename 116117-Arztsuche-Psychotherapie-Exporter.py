@@ -1,169 +1,23 @@
 import streamlit as st
-import pandas as pd
-import requests
-import openpyxl
-from datetime import datetime, timedelta  # <-- timedelta ergänzt
-import time
-import base64  # <-- hinzugefügt für req-val Berechnung
-from zoneinfo import ZoneInfo  # <-- hinzugefügt für Zeitzone Europe/Berlin
-import re  # <-- hinzugefügt für robuste Zeitformat-Parsing
-import os  # <-- hinzugefügt für Datei-Existenzprüfung
-import math  # <-- hinzugefügt fürs Aufrunden von Distanzen
+
+from arztsuche.api import ApiError, altersgruppe_options, setting_options, verfahren_options
+from arztsuche.export import WOCHENTAGE_KURZ, available_exporters, export_bytes, submit_workbook
+from arztsuche.metrics import admin_enabled, registry, render_prometheus, setup_logging, start_metrics_server, timed
+from arztsuche.schedule import todays_phone_windows
+from arztsuche.pipeline import suche
+from arztsuche.search import PlzNichtGefunden
+
+# Strukturierte Logs nur mit ARZTSUCHE_LOG_LEVEL; Prometheus-Endpunkt nur mit ARZTSUCHE_METRICS_PORT
+setup_logging()
+start_metrics_server()
 
 # --- Session-State Defaults ---
 if "downloaded" not in st.session_state:
     st.session_state["downloaded"] = False
-if "arzt_praxis_daten" not in st.session_state:
-    st.session_state["arzt_praxis_daten"] = None
-if "now_berlin_iso" not in st.session_state:
-    st.session_state["now_berlin_iso"] = None
-if "excel_path" not in st.session_state:
-    st.session_state["excel_path"] = None
-
-# Funktion, um die Koordinaten aus der CSV-Datei zu holen
-def get_lat_lon_from_plz(postcode):
-    try:
-        # Lese die CSV-Datei mit den PLZ-Koordinaten
-        df = pd.read_csv("plz_geocoord.csv")
-        
-        # Suche nach der Zeile mit der passenden PLZ
-        result = df[df['plz'] == int(postcode)]
-        
-        # Überprüfen, ob die PLZ gefunden wurde
-        if not result.empty:
-            lat = result['lat'].values[0]
-            lng = result['lng'].values[0]
-            return lat, lng
-        else:
-            st.warning(f"Keine Koordinaten für die PLZ {postcode} gefunden.")
-            return None, None
-    except FileNotFoundError as e:
-        st.error(f"Datei 'plz_geocoord.csv' wurde nicht gefunden: {e}")
-        return None, None
-    except Exception as e:
-        st.error(f"Fehler beim Lesen der CSV-Datei: {e}")
-        return None, None
-
-# --- req-val Generator (Port der JS-Funktion), wie vorgeschlagen ---
-def c(e: float, t: float):
-    e += 1.1
-    [r, a] = str(e).split('.')
-    n = r[len(r) - 1]
-
-    t += 2.3
-    [l, c_] = str(t).split('.')
-    o = l[len(l) - 1]
-
-    s = "000" # time seems not to be checked
-
-    d = n + s[len(s) - 1] + o + s[len(s) - 2] + a[0] + s[len(s) - 3] + c_[0]
-    return base64.b64encode(d.encode("utf-8"))
-
-# ---- Neu: Helfer für "jetzt telefonisch erreichbar" & "nächste Zeitfenster" ----
-def _parse_time(hhmm: str):
-    return datetime.strptime(hhmm.strip(), "%H:%M").time()
-
-weekday_idx_map = {"Mo.": 0, "Di.": 1, "Mi.": 2, "Do.": 3, "Fr.": 4, "Sa.": 5, "So.": 6}
-
-def is_reachable_now(arzt: dict, now_dt: datetime) -> bool:
-    """Prüft, ob der Eintrag jetzt (Europe/Berlin) telefonisch erreichbar ist."""
-    today_idx = now_dt.weekday()
-
-    for ts in arzt.get("tsz", []):
-        tag = ts.get("t", "")
-        if weekday_idx_map.get(tag, -1) != today_idx:
-            continue
-        for ts_typ in ts.get("tszDesTyps", []):
-            if ts_typ.get("typ") != "Telefonische Erreichbarkeit":
-                continue
-            for sprechzeit in ts_typ.get("sprechzeiten", []):
-                raw = (sprechzeit.get("zeit", "") or "").replace(" ", "")
-                # mehrere Intervalle per ; oder , getrennt erlauben
-                for interval in re.split(r"[;,]", raw):
-                    if not interval or "-" not in interval:
-                        continue
-                    try:
-                        start_s, end_s = interval.split("-")
-                        start_t, end_t = _parse_time(start_s), _parse_time(end_s)
-                        if start_t <= now_dt.time() <= end_t:
-                            return True
-                    except Exception:
-                        continue
-    return False
-
-def todays_phone_windows(arzt: dict, now_dt: datetime) -> str:
-    """Gibt alle heutigen Telefonzeiten als kommagetrennte Liste zurück (für Anzeige)."""
-    today_idx = now_dt.weekday()
-    windows = []
-    for ts in arzt.get("tsz", []):
-        if weekday_idx_map.get(ts.get("t", ""), -1) != today_idx:
-            continue
-        for ts_typ in ts.get("tszDesTyps", []):
-            if ts_typ.get("typ") == "Telefonische Erreichbarkeit":
-                for sprechzeit in ts_typ.get("sprechzeiten", []):
-                    w = sprechzeit.get("zeit", "").strip()
-                    if w:
-                        windows.append(w)
-    # Duplikate entfernen, sortiert ausgeben
-    return ", ".join(sorted(set(windows)))
-
-def _norm_tel(t: str) -> str:
-    # Nur Ziffern behalten -> stabile Vergleichsbasis für Duplikaterkennung
-    return re.sub(r"\D+", "", t or "")
-
-def next_available_windows(arzt_liste: list[dict], now_dt: datetime, max_results: int = 5):
-    """Sucht die nächsten Telefon-Zeitfenster (nur zukünftige Starts; bis 7 Tage voraus), ohne Duplikate."""
-    results = []
-    seen = set()  # <-- Duplikate verhindern
-    tz = ZoneInfo("Europe/Berlin")
-    now_local = now_dt  # already in Europe/Berlin
-
-    for a in arzt_liste:
-        name = a.get("name", "") or ""
-        tel = a.get("tel", "") or ""
-        tel_norm = _norm_tel(tel)
-        ort = a.get("ort", "") or ""
-        plz = a.get("plz", "") or ""
-        arzt_id = a.get("id", "") or ""
-
-        for day_offset in range(0, 7):  # heute + nächste 6 Tage
-            day_dt = (now_local + timedelta(days=day_offset)).date()
-            for ts in a.get("tsz", []):
-                tag = ts.get("t", "")
-                if weekday_idx_map.get(tag, -1) != (now_local.weekday() + day_offset) % 7:
-                    continue
-                for ts_typ in ts.get("tszDesTyps", []):
-                    if ts_typ.get("typ") != "Telefonische Erreichbarkeit":
-                        continue
-                    for sprechzeit in ts_typ.get("sprechzeiten", []):
-                        raw = (sprechzeit.get("zeit", "") or "").replace(" ", "")
-                        for interval in re.split(r"[;,]", raw):
-                            if not interval or "-" not in interval:
-                                continue
-                            try:
-                                start_s, end_s = interval.split("-")
-                                start_t, end_t = _parse_time(start_s), _parse_time(end_s)
-                                start_dt = datetime.combine(day_dt, start_t).replace(tzinfo=tz)
-                                end_dt = datetime.combine(day_dt, end_t).replace(tzinfo=tz)
-                                # NUR echte Zukunft: Start > jetzt (keine laufenden Slots)
-                                if start_dt > now_local:
-                                    key = (arzt_id, name.strip(), tel_norm, start_dt, end_dt)
-                                    if key in seen:
-                                        continue
-                                    seen.add(key)
-                                    results.append({
-                                        "Start": start_dt,
-                                        "Ende": end_dt,
-                                        "Name": name,
-                                        "Telefon": tel,
-                                        "Ort": ort,
-                                        "PLZ": plz
-                                    })
-                            except Exception:
-                                continue
-    # Nach Startzeit sortieren und begrenzen
-    results_sorted = sorted(results, key=lambda x: x["Start"])[:max_results]
-    return results_sorted
+if "ergebnis" not in st.session_state:
+    st.session_state["ergebnis"] = None
+if "excel_job" not in st.session_state:
+    st.session_state["excel_job"] = None
 
 # Streamlit App
 
@@ -209,33 +63,15 @@ radius_options = [5, 10, 25, 50, 100]
 radius_selection = st.selectbox("Suchradius (in km)", radius_options, index=2)  # Default 25 km
 
 
-# Auswahl für Psychotherapie: Verfahren
-verfahren_options = {
-    "Analytische Psychotherapie": "A",
-    "Systemische Therapie": "S",
-    "Tiefenpsychologisch fundierte Psychotherapie": "T",
-    "Verhaltenstherapie": "V"
-}
+# Auswahl für Psychotherapie: Verfahren (Optionen in arztsuche.api)
 verfahren_selection = st.selectbox("Verfahren", list(verfahren_options.keys()), index=0)
 
 # Auswahl für Psychotherapie: Altersgruppe
-altersgruppe_options = {
-    "Erwachsen": "E",
-    "Kinder & Jugend": "K"
-}
 altersgruppe_selection = st.selectbox("Altersgruppe", list(altersgruppe_options.keys()), index=0)
 
 # Auswahl für Psychotherapie: Setting
-setting_options = {
-    "Einzeltherapie": "E",
-    "Gruppentherapie": "G"
-}
 setting_selection = st.selectbox("Setting", list(setting_options.keys()), index=0)
 
-# --- KEINE User-Inputs für req-val & Authorization: fest hinterlegt / automatisch ---
-# Eingabefelder entfernt; statische Authorization + automatische req-val-Berechnung
-AUTH_CODE_BASE64 = "YmRwczpma3I0OTNtdmdfZg=="  # vom Nutzer vorgegeben
-
 # ===========================
 # SUCHE AUSFÜHREN
 # ===========================
@@ -243,187 +79,193 @@ if st.button("🔎 Psychotherapeut*innen finden"):
     if not postcode:
         st.warning("Bitte gib eine Postleitzahl ein.")
     else:
-        # Holen der Koordinaten aus der CSV-Datei
-        lat, lon = get_lat_lon_from_plz(postcode)
-
-        if lat is not None and lon is not None:
-            url = "https://arztsuche.116117.de/api/data"
-
-            # req-val aus lat/lon erzeugen (Bytes -> String)
-            try:
-                req_val_final = c(float(lat), float(lon)).decode("utf-8")
-            except Exception as e:
-                st.error(f"Fehler bei der req-val Generierung: {e}")
-                st.stop()
-
-            headers = {
-                "Host": "arztsuche.116117.de",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "req-val": req_val_final,
-                "Authorization": f"Basic {AUTH_CODE_BASE64}"
-            }
-
-            data = {
-                "r": 900,
-                "lat": lat,
-                "lon": lon,
-                "filterSelections": [
-                    {"title": "Fachgebiet Kategorie", "fieldName": "fgg", "selectedCodes": ["12"]},
-                    {"title": "Psychotherapie: Verfahren", "fieldName": "ptv", "selectedCodes": [verfahren_options[verfahren_selection]]},
-                    {"title": "Psychotherapie: Altersgruppe", "fieldName": "pta", "selectedCodes": [altersgruppe_options[altersgruppe_selection]]},
-                    {"title": "Psychotherapie: Setting", "fieldName": "pts", "selectedCodes": [setting_options[setting_selection]]}
-                ],
-                "locOrigin": "USER_INPUT",
-                "initialSearch": True,
-                "viaDeeplink": False
-            }
-
-            try:
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()  # Prüft auf HTTP-Fehlerstatus
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        if "arztPraxisDatas" in response_data:
-                            arzt_praxis_daten = response_data["arztPraxisDatas"]
-
-                            # Filter nach Radius
-                            arzt_praxis_daten = [
-                                a for a in arzt_praxis_daten
-                                if a.get("distance", 0) <= radius_selection * 1000
-                            ]
-
-
-                            # -------- Excel erzeugen wie gehabt --------
-                            wb = openpyxl.Workbook()
-                            ws_praxis = wb.active
-                            ws_praxis.title = "Praxisdaten"
-                            ws_praxis.append(["id", "name", "tel", "geschlecht", "strasse", "hausnummer", "plz", "ort", "email", "distanz in meter von plz", "web", "telefonische_sprechzeiten"])
-                            ws_sprechzeiten = wb.create_sheet("Telefonsprechzeiten")
-                            ws_sprechzeiten.append(["Wochentag", "Uhrzeit", "Arzt / Ärztin", "Telefon"])
-                            wochentage = {"Mo.": "Mo", "Di.": "Di", "Mi.": "Mi", "Do.": "Do", "Fr.": "Fr", "Sa.": "Sa", "So.": "So"}
-                            sprechzeiten_dict = {day: {} for day in wochentage.values()}
-
-                            for arzt in arzt_praxis_daten:
-                                telefonische_sprechzeiten = set()
-                                if "tsz" in arzt:
-                                    for ts in arzt["tsz"]:
-                                        for ts_typ in ts.get("tszDesTyps", []):
-                                            if ts_typ.get("typ") == "Telefonische Erreichbarkeit":
-                                                for sprechzeit in ts_typ.get("sprechzeiten", []):
-                                                    zeit = sprechzeit.get("zeit", "")
-                                                    tag = ts.get("t", "")
-                                                    if tag in wochentage:
-                                                        telefonische_sprechzeiten.add(f"{wochentage[tag]} {zeit} Uhr")
-                                                        if zeit not in sprechzeiten_dict[wochentage[tag]]:
-                                                            sprechzeiten_dict[wochentage[tag]][zeit] = set()
-                                                        sprechzeiten_dict[wochentage[tag]][zeit].add(f"{arzt.get('name', 'Unbekannt')} (Tel: {arzt.get('tel', 'Nicht angegeben')})")
-                                hausnummer = str(arzt.get("hausnummer", ""))
-                                if " " in hausnummer or "-" in hausnummer:
-                                    hausnummer = f'"{hausnummer}"'
-
-                                ws_praxis.append([
-                                    arzt.get("id", ""), arzt.get("name", ""), arzt.get("tel", ""),
-                                    arzt.get("geschlecht", ""), arzt.get("strasse", ""), hausnummer,
-                                    arzt.get("plz", ""), arzt.get("ort", ""), arzt.get("email", ""),
-                                    arzt.get("distance", ""), arzt.get("web", ""),
-                                    ", ".join(telefonische_sprechzeiten)
-                                ])
-
-                            for wochentag, zeiten in sprechzeiten_dict.items():
-                                sorted_zeiten = sorted(zeiten.items(), key=lambda x: datetime.strptime(x[0].split('-')[0], '%H:%M'))
-                                for zeit, aerzte in sorted_zeiten:
-                                    ws_sprechzeiten.append([wochentag, zeit, ", ".join(aerzte)])
-
-                            # Ladebalken simulieren
-                            progress_bar = st.progress(0)
-                            for i in range(100):
-                                time.sleep(0.05)  # Simuliere eine Pause von 20ms "oh da passiert ja was!"
-                                progress_bar.progress(i + 1)
-
-                            # Speichern der Datei
-                            excel_path = "116117_therapeuten_mit_sprechstunden.xlsx"
-                            wb.save(excel_path)
-
-                            # --- Session persistieren + RERUN (wichtig: keine doppelte Anzeige) ---
-                            now_berlin = datetime.now(ZoneInfo("Europe/Berlin"))
-                            st.session_state["arzt_praxis_daten"] = arzt_praxis_daten
-                            st.session_state["now_berlin_iso"] = now_berlin.isoformat()
-                            st.session_state["excel_path"] = excel_path
-                            st.session_state["downloaded"] = False  # reset bei neuer Suche
-
-                            st.rerun()  # <<< nur noch unten aus Session rendern
-
-                        else:
-                            st.error("❌ Antwort enthält keine 'arztPraxisDatas'.")
-                    except Exception as e:
-                        st.error(f"⚠️ Fehler beim Parsen der Antwort: {e}")
-                else:
-                    st.error(f"❌ Anfrage fehlgeschlagen (Statuscode {response.status_code})")
-            except requests.exceptions.RequestException as e:
-                st.error(f"Fehler bei der Anfrage: {e}")
+        progress_bar = st.progress(0.0, text="Koordinaten werden ermittelt …")
+
+        try:
+            # Über die Pipeline: gleichzeitige identische Suchen anderer Sessions teilen sich das Ergebnis
+            ergebnis = suche(
+                postcode, radius_selection,
+                verfahren_options[verfahren_selection],
+                altersgruppe_options[altersgruppe_selection],
+                setting_options[setting_selection],
+                on_stage=lambda text, anteil: progress_bar.progress(anteil, text=text),
+            )
+        except PlzNichtGefunden as e:
+            st.warning(str(e))
+            st.stop()
+        except FileNotFoundError as e:
+            st.error(f"Datei 'plz_geocoord.csv' wurde nicht gefunden: {e}")
+            st.stop()
+        except ApiError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+        except TimeoutError:
+            st.error("❌ Die Suche hat zu lange gedauert. Bitte versuche es gleich noch einmal.")
+            st.stop()
+
+        # -------- Excel im Hintergrund erzeugen; die Tabellen unten warten nicht darauf --------
+        progress_bar.progress(0.9, text="Excel-Datei wird im Hintergrund erstellt …")
+        excel_job = submit_workbook(ergebnis.arzt_praxis_daten, ergebnis.schedules, ergebnis.anrufplan)
+
+        # --- Session persistieren + RERUN (wichtig: keine doppelte Anzeige) ---
+        st.session_state["ergebnis"] = ergebnis
+        st.session_state["excel_job"] = excel_job
+        st.session_state["downloaded"] = False  # reset bei neuer Suche
+
+        st.rerun()  # <<< nur noch unten aus Session rendern
+
+def download_section(excel_job, polling: bool):
+    """Download-Bereich; pollt als Fragment, solange der Export noch läuft."""
+
+    @st.fragment(run_every=0.5 if polling else None)
+    def _render():
+        if not excel_job.done():
+            st.progress(excel_job.fraction, text=excel_job.stage)
+            st.download_button(
+                key="download_xlsx",
+                label="⏳ Excel-Datei wird erstellt …",
+                data=b"",
+                disabled=True
+            )
+            return
+        if polling:
+            st.rerun(scope="app")  # Polling beenden, Button regulär rendern
+
+        try:
+            excel_bytes = excel_job.result()
+        except Exception as e:
+            st.error(f"⚠️ Fehler beim Erstellen der Excel-Datei: {e}")
+            return
+
+        clicked_cached = st.download_button(
+            key="download_xlsx",  # <<< eindeutiger Schlüssel
+            label=("📥 Excel-Datei mit Therapie-Kontakten herunterladen"
+                   if not st.session_state["downloaded"]
+                   else "✅ Erfolgreich heruntergeladen!"),
+            data=excel_bytes,
+            file_name="116117_therapeuten_mit_sprechstunden.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            disabled=st.session_state["downloaded"]
+        )
+        if clicked_cached:
+            st.session_state["downloaded"] = True
+            st.rerun()  # UI sofort mit neuem Label/disabled zeigen
+
+    _render()
+
+
+def metriken_admin():
+    """Laufzeiten und Größen pro Suchschritt seit dem Start dieses Prozesses (nur mit ARZTSUCHE_METRICS_ADMIN)."""
+    rows = registry.snapshot()
+    if not rows:
+        st.info("Noch keine Messwerte – zuerst eine Suche ausführen.")
+    else:
+        st.dataframe([
+            {"Metrik": r["metrik"], "Schritt / Art": r["label"], "Anzahl": r["anzahl"],
+             "Mittelwert": round(r["mittel"], 4), "Summe": round(r["summe"], 4)}
+            for r in rows
+        ], hide_index=True)
+
+    prometheus_text = render_prometheus()
+    st.code(prometheus_text, language="text")
+    st.download_button("📥 metrics.txt herunterladen", data=prometheus_text, file_name="metrics.txt", mime="text/plain")
+
+    if st.button("Zurücksetzen", key="metriken_reset"):
+        registry.reset()
+        st.rerun()
+
+
+def weitere_formate(ergebnis):
+    """Weitere Formate aus demselben Ergebnis; erzeugt wird erst beim Klick."""
+    exporter = [e for e in available_exporters() if e.name != "xlsx"]
+    st.caption("Weitere Formate:")
+    for spalte, e in zip(st.columns(len(exporter)), exporter):
+        with spalte:
+            st.download_button(
+                f"📄 {e.label}",
+                data=lambda fmt=e.name: export_bytes(fmt, ergebnis.arzt_praxis_daten, ergebnis.schedules,
+                                                    anrufplan=ergebnis.anrufplan),
+                file_name=f"116117_therapeuten_mit_sprechstunden{e.suffix}",
+                mime=e.mime,
+                key=f"download_{e.name}",
+                on_click="ignore",
+            )
 
 # ===========================
 # ANSICHT AUS SESSION WIEDERHERSTELLEN (einzige Render-Stelle)
 # ===========================
-if st.session_state["arzt_praxis_daten"]:
-    try:
-        now_iso = st.session_state["now_berlin_iso"]
-        now_berlin_cached = datetime.fromisoformat(now_iso) if now_iso else datetime.now(ZoneInfo("Europe/Berlin"))
-        arzt_praxis_daten_cached = st.session_state["arzt_praxis_daten"]
-
-        reachable_cached = [a for a in arzt_praxis_daten_cached if is_reachable_now(a, now_berlin_cached)]
-
-        st.subheader("📞 Jetzt telefonisch erreichbar")
-        st.caption(f"Aktuelle Zeit: {now_berlin_cached.strftime('%a, %d.%m.%Y, %H:%M')} – Treffer: {len(reachable_cached)}")
-
-        if reachable_cached:
-            df_now_cached = pd.DataFrame([{
-                "Name": a.get("name", ""),
-                "Telefon": a.get("tel", ""),
-                "Ort": a.get("ort", ""),
-                "PLZ": a.get("plz", ""),
-                "Zeiten heute": todays_phone_windows(a, now_berlin_cached),
-                ## "Entfernung (m)": a.get("distance", "")
-            } for a in reachable_cached])
-            if "Entfernung (m)" in df_now_cached.columns:
-                df_now_cached = df_now_cached.sort_values(by=["Entfernung (m)"], kind="stable")
-            st.dataframe(df_now_cached.head(10), use_container_width=True, hide_index=True)
-        else:
-            st.info("Gerade ist leider niemand mit ausgewiesener telefonischer Erreichbarkeit verfügbar.")
-
-        next_slots_cached = next_available_windows(arzt_praxis_daten_cached, now_berlin_cached, max_results=5)
-        if next_slots_cached:
-            st.subheader("⏭️ Nächste Telefonsprechzeiten")
-            df_next_cached = pd.DataFrame([{
-                "Telefonsprechzeit": f'{s["Start"].strftime("%d.%m.%Y, %H:%M")} bis {s["Ende"].strftime("%H:%M")}',
-                "Name": s["Name"],
-                "Telefon": s["Telefon"],
-                "Ort": s["Ort"],
-                "PLZ": s["PLZ"]
-            } for s in next_slots_cached])
-            st.dataframe(df_next_cached, use_container_width=True, hide_index=True)
-        else:
-            st.caption("Keine kommenden Telefonsprechzeiten in den nächsten 7 Tagen gefunden.")
-
-        # Persistenter Download-Button (einmalig, mit stabilem key)
-        if st.session_state["excel_path"] and os.path.exists(st.session_state["excel_path"]):
-            with open(st.session_state["excel_path"], "rb") as file:
-                clicked_cached = st.download_button(
-                    key="download_xlsx",  # <<< eindeutiger Schlüssel
-                    label=("📥 Excel-Datei mit Therapie-Kontakten herunterladen"
-                           if not st.session_state["downloaded"]
-                           else "✅ Erfolgreich heruntergeladen!"),
-                    data=file,
-                    file_name="116117_therapeuten_mit_sprechstunden.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    disabled=st.session_state["downloaded"]
-                )
-            if clicked_cached:
-                st.session_state["downloaded"] = True
-                st.rerun()  # UI sofort mit neuem Label/disabled zeigen
-            
-            st.info("Viel Erfolg bei der Suche nach einem Therapieplatz! :)")
-
-    except Exception as e:
-        st.warning(f"Ansicht konnte nicht aus dem Zwischenspeicher wiederhergestellt werden: {e}")
+if st.session_state["ergebnis"]:
+    with timed("render"):
+        try:
+            ergebnis = st.session_state["ergebnis"]
+            now_berlin_cached = ergebnis.zeitpunkt
+            arzt_praxis_daten_cached = ergebnis.arzt_praxis_daten
+            schedules_cached = ergebnis.schedules
+            window_table_cached = ergebnis.window_table
+
+            # Indizes statt Zeilen-Dicts: die Tabelle wird nicht bei jedem Rerun neu aufgebaut
+            reachable_idx = window_table_cached.reachable_mask(now_berlin_cached).nonzero()[0]
+
+            if ergebnis.radius_km and ergebnis.radius_km > ergebnis.radius_gewaehlt:
+                st.info(f"Im Umkreis von {ergebnis.radius_gewaehlt} km gab es nur wenige Treffer – die Suche wurde auf {ergebnis.radius_km} km erweitert.")
+
+            st.subheader("📞 Jetzt telefonisch erreichbar")
+            st.caption(f"Aktuelle Zeit: {now_berlin_cached.strftime('%a, %d.%m.%Y, %H:%M')} – Treffer: {len(reachable_idx)}")
+
+            if len(reachable_idx):
+                top_idx = reachable_idx[:10]
+                rows_now = arzt_praxis_daten_cached.frame(
+                    top_idx, {"name": "Name", "tel": "Telefon", "ort": "Ort", "plz": "PLZ"}
+                ).append_column("Zeiten heute", [[
+                    todays_phone_windows(schedules_cached[i], now_berlin_cached) for i in top_idx
+                ]])
+                st.dataframe(rows_now, use_container_width=True, hide_index=True)
+            else:
+                st.info("Gerade ist leider niemand mit ausgewiesener telefonischer Erreichbarkeit verfügbar.")
+
+            next_slots_cached = window_table_cached.next_windows(arzt_praxis_daten_cached, now_berlin_cached, k=5)
+            if next_slots_cached:
+                st.subheader("⏭️ Nächste Telefonsprechzeiten")
+                rows_next = [{
+                    "Telefonsprechzeit": f'{s["Start"].strftime("%d.%m.%Y, %H:%M")} bis {s["Ende"].strftime("%H:%M")}',
+                    "Name": s["Name"],
+                    "Telefon": s["Telefon"],
+                    "Ort": s["Ort"],
+                    "PLZ": s["PLZ"]
+                } for s in next_slots_cached]
+                st.dataframe(rows_next, use_container_width=True, hide_index=True)
+            else:
+                st.caption("Keine kommenden Telefonsprechzeiten in den nächsten 7 Tagen gefunden.")
+
+            plan = ergebnis.anrufplan
+            if plan.route:
+                st.subheader("🗓️ Anrufroute")
+                st.caption(f"In diesen {len(plan.route)} Zeitblöcken erreichst du jede Praxis mit Telefonzeiten mindestens einmal.")
+                rows_route = [{
+                    "Wochentag": WOCHENTAGE_KURZ[block.weekday],
+                    "Zeitblock": block.zeit,
+                    "Neu erreichbar": len(neu),
+                    "Praxen": ", ".join(arzt_praxis_daten_cached[i].get("name", "") or "" for i in neu),
+                } for block, neu in plan.route]
+                st.dataframe(rows_route, use_container_width=True, hide_index=True)
+
+            invalid_count = sum(len(sched.invalid) for sched in schedules_cached)
+            if invalid_count:
+                st.caption(f"⚠️ {invalid_count} Zeitangabe(n) von 116117 konnten nicht gelesen werden und wurden übersprungen.")
+
+            # Persistenter Download-Button – erst aktiv, wenn der Hintergrund-Export fertig ist
+            excel_job = st.session_state["excel_job"]
+            if excel_job is not None:
+                download_section(excel_job, polling=not excel_job.done())
+                weitere_formate(ergebnis)
+                st.info("Viel Erfolg bei der Suche nach einem Therapieplatz! :)")
+
+        except Exception as e:
+            st.warning(f"Ansicht konnte nicht aus dem Zwischenspeicher wiederhergestellt werden: {e}")
+
+# ===========================
+# METRIKEN (ADMIN) – öffentlich nicht sichtbar
+# ===========================
+if admin_enabled():
+    with st.expander("📈 Metriken (Admin)"):
+        metriken_admin()
@@ -1,96 +1,124 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import io
+
+from arztsuche.export import WOCHENTAGE_KURZ
+from arztsuche.kontakte import STATUS_OPTIONEN, KontaktStore, get_kontakt_store
+from arztsuche.tageskontakte import file_hash, read_anrufliste, updated_workbook, zeilen_stand
+
+PAGE_SIZE = 20  # Praxen pro Seite – Widgets werden nur für die aktuelle Seite erzeugt
 
 st.set_page_config(page_title="Tages-Telefonkontakte", page_icon="📞", layout="centered")
 
 st.title("📞 Tages-Telefonkontakte")
 
+# Status je Praxis und Tag: dauerhaft mit ARZTSUCHE_KONTAKTE_DB, sonst nur für diese Session
+kontakt_store = get_kontakt_store()
+if kontakt_store is None:
+    if "kontakt_store" not in st.session_state:
+        st.session_state["kontakt_store"] = KontaktStore()
+    kontakt_store = st.session_state["kontakt_store"]
+
+
+@st.cache_resource(show_spinner="Datei wird eingelesen …", max_entries=8)
+def parse_upload(digest: str, _data: bytes):
+    """Einmal pro Datei-Hash parsen; ``_data`` geht bewusst nicht in den Cache-Schlüssel ein.
+
+    ``cache_resource`` statt ``cache_data``: die Anrufliste wird nur gelesen und soll bei
+    Reruns nicht jedes Mal aus dem Pickle neu aufgebaut werden.
+    """
+    return read_anrufliste(_data)
+
+
+def _store_praxis(praxis_id: str, name: str, tel: str):
+    """Widget-Werte einer Praxis als neuen Eintrag im Kontakt-Store ablegen (ein Insert)."""
+    kontakt_store.setze(
+        praxis_id,
+        st.session_state[f"status_{praxis_id}"],
+        st.session_state[f"note_{praxis_id}"],
+        name=name, tel=tel,
+    )
+
+
 uploaded_file = st.file_uploader("Bitte Excel-Datei hochladen", type=["xlsx"])
 
 if uploaded_file is not None:
-    excel = pd.ExcelFile(uploaded_file)
-    sheet_name = excel.sheet_names[1] if len(excel.sheet_names) > 1 else excel.sheet_names[0]
-    df = pd.read_excel(excel, sheet_name=sheet_name)
+    data = uploaded_file.getvalue()
+    anrufliste = parse_upload(file_hash(data), data)
 
-    today = datetime.today().strftime("%A")
-    weekdays_map = {
-        "Monday": "Mo", "Tuesday": "Di", "Wednesday": "Mi",
-        "Thursday": "Do", "Friday": "Fr", "Saturday": "Sa", "Sunday": "So"
-    }
-    today_de = weekdays_map.get(today, today)
+    today_de = WOCHENTAGE_KURZ[datetime.today().weekday()]
 
     st.subheader(f"Heutige Kontakte – {today_de}")
 
-    if "Wochentag" not in df.columns:
+    if anrufliste.column("Wochentag") is None:
         st.error("❌ Keine Spalte 'Wochentag' im Tabellenblatt gefunden.")
     else:
-        day_df = df[df["Wochentag"].str.strip().str.lower() == today_de.lower()]
+        day_rows = anrufliste.rows_for_day(today_de)
+        view_cols = [anrufliste.column(c) for c in ("Arzt / Ärztin", "Uhrzeit", "Telefon")]
 
-        if day_df.empty:
+        if not day_rows:
             st.info(f"Keine Kontakte für {today_de} gefunden.")
+        elif None in view_cols:
+            st.error("❌ Spalten 'Arzt / Ärztin', 'Uhrzeit' oder 'Telefon' fehlen in der Datei.")
         else:
-            view_cols = ["Arzt / Ärztin", "Uhrzeit", "Telefon"]
-            if not all(col in day_df.columns for col in view_cols):
-                st.error("❌ Spalten 'Arzt / Ärztin', 'Uhrzeit' oder 'Telefon' fehlen in der Datei.")
-            else:
-                if "Status" not in day_df.columns:
-                    day_df["Status"] = ""
-                if "Notiz" not in day_df.columns:
-                    day_df["Notiz"] = ""
-
-                st.markdown("---")
-                st.markdown("### 💬 Kontakt-Chat")
-
-                for i, row in day_df.iterrows():
-                    with st.chat_message("user"):
-                        st.markdown(f"**{row['Arzt / Ärztin']}**  \n🕒 {row['Uhrzeit']}  \n📞 {row['Telefon']}")
-
-                    with st.chat_message("assistant"):
-                        status = st.radio(
-                            f"Status für {row['Arzt / Ärztin']}",
-                            ["Noch offen", "Nicht Erreicht", "Auf AB gesprochen", "Auf Warteliste"],
-                            key=f"status_{i}",
-                            horizontal=True
-                        )
-                        day_df.at[i, "Status"] = status if status != "Noch offen" else ""
-
-                        note = st.text_input(
-                            f"Notiz zu {row['Arzt / Ärztin']}",
-                            key=f"note_{i}",
-                            placeholder="Kurze Notiz (optional)"
-                        )
-                        day_df.at[i, "Notiz"] = note
-
-                        st.markdown("---")
-                # Fortschritt berechnen
-                total = len(day_df)
-                done = day_df["Status"].replace("", pd.NA).notna().sum()
-                progress = done / total
-            
-
-                st.markdown("### 📊 Fortschritt")
-                st.progress(progress)
-                st.write(f"{done} von {total} Kontakten bearbeitet")
-              
-                if all(day_df["Status"].replace("", pd.NA).notna()):
-                    st.success("🎉 Alle Kontakte für heute wurden bearbeitet!")
-
-                # Download der aktualisierten Datei
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                    merged_df = df.merge(
-                        day_df[["Arzt / Ärztin", "Uhrzeit", "Status", "Notiz"]],
-                        on=["Arzt / Ärztin", "Uhrzeit"],
-                        how="left",
-                        suffixes=("", "_neu")
+            zeit_col = view_cols[1]
+            stand = kontakt_store.stand()  # heutiger Stand je Praxis
+
+            st.markdown("---")
+            st.markdown("### 💬 Kontakt-Chat")
+
+            # Jede Praxis einmal, beim ersten heutigen Zeitfenster (eine Zeile kann mehrere Praxen enthalten)
+            eintraege = {}
+            for i in day_rows:
+                row = anrufliste.rows[i]
+                for praxis_id, name, tel in anrufliste.praxen(i):
+                    eintraege.setdefault(praxis_id, (name, tel, row[zeit_col] if zeit_col < len(row) else ""))
+            eintraege = list(eintraege.items())
+
+            pages = (len(eintraege) + PAGE_SIZE - 1) // PAGE_SIZE
+            page = 1
+            if pages > 1:
+                page = st.number_input(f"Seite (von {pages})", min_value=1, max_value=pages, value=1, step=1)
+
+            for praxis_id, (name, tel, uhrzeit) in eintraege[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+                status, note = stand.get(praxis_id, ("", ""))
+
+                with st.chat_message("user"):
+                    st.markdown(f"**{name}**  \n🕒 {uhrzeit}  \n📞 {tel}")
+
+                with st.chat_message("assistant"):
+                    st.radio(
+                        f"Status für {name}",
+                        STATUS_OPTIONEN,
+                        index=STATUS_OPTIONEN.index(status) if status in STATUS_OPTIONEN else 0,
+                        key=f"status_{praxis_id}",
+                        horizontal=True,
+                        on_change=_store_praxis, args=(praxis_id, name, tel),
+                    )
+                    st.text_input(
+                        f"Notiz zu {name}",
+                        value=note,
+                        key=f"note_{praxis_id}",
+                        placeholder="Kurze Notiz (optional)",
+                        on_change=_store_praxis, args=(praxis_id, name, tel),
                     )
-                    merged_df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-                st.download_button(
-                    "📥 Aktualisierte Excel-Datei herunterladen",
-                    data=output.getvalue(),
-                    file_name="aktualisierte_kontakte.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                    st.markdown("---")
+
+            # Fortschritt berechnen (über alle heutigen Praxen, nicht nur die aktuelle Seite)
+            total = len(eintraege)
+            done = sum(1 for praxis_id, _ in eintraege if stand.get(praxis_id, ("", ""))[0])
+
+            st.markdown("### 📊 Fortschritt")
+            st.progress(done / total if total else 1.0)
+            st.write(f"{done} von {total} Kontakten bearbeitet")
+
+            if done == total:
+                st.success("🎉 Alle Kontakte für heute wurden bearbeitet!")
+
+            # Download der aktualisierten Datei – die Arbeitsmappe entsteht erst beim Klick
+            updates = zeilen_stand(anrufliste, day_rows, stand)
+            st.download_button(
+                "📥 Aktualisierte Excel-Datei herunterladen",
+                data=lambda: updated_workbook(data, anrufliste, updates),
+                file_name="aktualisierte_kontakte.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
@@ -0,0 +1,45 @@
+"""Hilfsbibliothek für den 116117-Arztsuche-Psychotherapie-Exporter.
+
+Nutzbar ohne Streamlit, z.B.::
+
+    from arztsuche import suche, workbook_bytes
+    ergebnis = suche("10115", 25, "V", "E", "E")
+    data = workbook_bytes(ergebnis.arzt_praxis_daten, ergebnis.schedules)
+
+Die Untermodule werden erst beim ersten Zugriff geladen, damit ``import arztsuche``
+billig bleibt (requests/openpyxl/numpy nur bei Bedarf).
+"""
+import importlib
+
+_EXPORTS = {
+    "ApiClient": "arztsuche.api",
+    "ApiError": "arztsuche.api",
+    "get_api_client": "arztsuche.api",
+    "get_plz_index": "arztsuche.plz_index",
+    "get_response_cache": "arztsuche.cache",
+    "PraxisTabelle": "arztsuche.praxen",
+    "Schedule": "arztsuche.schedule",
+    "build_schedules": "arztsuche.schedule",
+    "is_reachable_now": "arztsuche.schedule",
+    "next_available_windows": "arztsuche.schedule",
+    "todays_phone_windows": "arztsuche.schedule",
+    "WindowTable": "arztsuche.engine",
+    "build_anrufplan": "arztsuche.anrufplan",
+    "export_bytes": "arztsuche.export",
+    "workbook_bytes": "arztsuche.export",
+    "PlzNichtGefunden": "arztsuche.search",
+    "Suchergebnis": "arztsuche.search",
+    "fetch_cached": "arztsuche.search",
+    "suche": "arztsuche.search",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'arztsuche' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,124 @@
+"""Anrufplan: Telefonzeiten aller Praxen als Zeitblöcke und kürzeste "Anrufroute".
+
+Alle Intervalle werden als Minuten ab Wochenbeginn (``Wochentag * 1440 + Minute``)
+geführt und nur über diese Ganzzahlen sortiert. Überlappende oder direkt
+aneinander anschließende Fenster eines Wochentags werden zu einem Zeitblock
+zusammengefasst; die Route wählt daraus möglichst wenige Blöcke, in denen
+zusammen jede Praxis mit Telefonzeiten mindestens einmal erreichbar ist.
+"""
+from arztsuche.schedule import _norm_tel
+
+_MIN_PER_DAY = 24 * 60
+
+
+def _fmt(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class Zeitblock:
+    """Zusammenhängende Telefonzeit an einem Wochentag.
+
+    ``practices``: Indizes (in ``arzt_liste``) der Praxen, die im Block erreichbar sind.
+    """
+
+    __slots__ = ("weekday", "start", "end", "practices")
+
+    def __init__(self, weekday: int, start: int, end: int, practices: tuple):
+        self.weekday = weekday
+        self.start = start
+        self.end = end
+        self.practices = practices
+
+    @property
+    def zeit(self) -> str:
+        return f"{_fmt(self.start)}-{_fmt(self.end)}"
+
+    def __repr__(self):
+        return f"Zeitblock({self.weekday}, {self.zeit}, {len(self.practices)} Praxen)"
+
+
+class Anrufplan:
+    """``bloecke``: alle Zeitblöcke chronologisch; ``route``: (Block, neu erreichte Praxen) je Schritt."""
+
+    __slots__ = ("bloecke", "route", "ohne_zeiten")
+
+    def __init__(self, bloecke: list, route: list, ohne_zeiten: list):
+        self.bloecke = bloecke
+        self.route = route
+        self.ohne_zeiten = ohne_zeiten
+
+
+def zeitbloecke(arzt_liste: list[dict], schedules: list) -> list[Zeitblock]:
+    """Fasst die Telefonfenster aller Praxen je Wochentag zu Zeitblöcken zusammen.
+
+    Dieselbe Praxis (id, Name, Telefon) mehrfach in der Antwort zählt nur einmal
+    (erstes Vorkommen), wie in :class:`arztsuche.engine.WindowTable`.
+    """
+    groups = {}
+    fenster = []  # (Start ab Wochenbeginn, Ende ab Wochenbeginn, Praxis-Index)
+    for i, (a, schedule) in enumerate(zip(arzt_liste, schedules)):
+        practice = groups.setdefault(
+            (a.get("id", "") or "", (a.get("name", "") or "").strip(), _norm_tel(a.get("tel", ""))), i
+        )
+        for day, start, end in schedule.windows:
+            base = day * _MIN_PER_DAY
+            fenster.append((base + start, base + max(start, end), practice))
+    fenster.sort()
+
+    bloecke = []
+    block_start = block_end = None
+    members = []
+    for start, end, practice in fenster:
+        # Neuer Block bei Lücke oder Tageswechsel; Überlappung/Anschluss (start == Ende) verlängert
+        if block_end is None or start > block_end or start // _MIN_PER_DAY != block_start // _MIN_PER_DAY:
+            if block_end is not None:
+                bloecke.append(_block(block_start, block_end, members))
+            block_start, block_end, members = start, end, []
+        block_end = max(block_end, end)
+        members.append(practice)
+    if block_end is not None:
+        bloecke.append(_block(block_start, block_end, members))
+    return bloecke
+
+
+def _block(start: int, end: int, members: list) -> Zeitblock:
+    day = start // _MIN_PER_DAY
+    base = day * _MIN_PER_DAY
+    return Zeitblock(day, start - base, end - base, tuple(sorted(set(members))))
+
+
+def anrufroute(bloecke: list[Zeitblock]) -> list[tuple]:
+    """Greedy-Überdeckung: wenige Blöcke, die zusammen jede Praxis erreichen.
+
+    Jeder Schritt nimmt den Block mit den meisten noch nicht erreichten Praxen
+    (bei Gleichstand den früheren). Ergebnis chronologisch als (Block, neue Praxen).
+    """
+    offen = {p for block in bloecke for p in block.practices}
+    gewaehlt = []
+    while offen:
+        best, best_neu = None, ()
+        for idx, block in enumerate(bloecke):
+            neu = [p for p in block.practices if p in offen]
+            if len(neu) > len(best_neu):
+                best, best_neu = idx, neu
+        gewaehlt.append((best, tuple(best_neu)))
+        offen.difference_update(best_neu)
+    gewaehlt.sort()
+    return [(bloecke[idx], neu) for idx, neu in gewaehlt]
+
+
+def build_anrufplan(arzt_liste: list[dict], schedules: list) -> Anrufplan:
+    bloecke = zeitbloecke(arzt_liste, schedules)
+    route = anrufroute(bloecke)
+    erreichbar = {p for block in bloecke for p in block.practices}
+    # Praxen ohne lesbare Telefonzeit (jede Praxis-Gruppe nur einmal)
+    seen = set()
+    ohne_zeiten = []
+    for i, a in enumerate(arzt_liste):
+        key = (a.get("id", "") or "", (a.get("name", "") or "").strip(), _norm_tel(a.get("tel", "")))
+        if key in seen:
+            continue
+        seen.add(key)
+        if i not in erreichbar:
+            ohne_zeiten.append(i)
+    return Anrufplan(bloecke, route, ohne_zeiten)
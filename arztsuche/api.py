@@ -0,0 +1,217 @@
+"""Gemeinsamer Client für ``https://arztsuche.116117.de/api/data``.
+
+Ein prozessweiter :class:`ApiClient` hält eine gepoolte ``requests.Session``
+(Verbindungen werden wiederverwendet), setzt Connect-/Read-Timeouts und
+wiederholt Anfragen bei 429/5xx mit Backoff + Jitter. Alle Aufrufer (Streamlit-Seite,
+Sammelexport) gehen über :func:`get_api_client`.
+
+Umgebungsvariablen:
+    ARZTSUCHE_API_URL       abweichender Endpunkt (z.B. lokaler Teststand)
+    ARZTSUCHE_UPSTREAM_RATE max. Anfragen pro Sekunde und Host für Sammelabrufe (Standard: 2)
+"""
+import base64
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from arztsuche.metrics import observe_payload_bytes, timed
+from arztsuche.pipeline import upstream_slot
+
+try:  # brotli nur anbieten, wenn urllib3 es auch dekodieren kann
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+API_URL = "https://arztsuche.116117.de/api/data"
+API_HOST = "arztsuche.116117.de"
+
+# --- KEINE User-Inputs für req-val & Authorization: fest hinterlegt / automatisch ---
+AUTH_CODE_BASE64 = "YmRwczpma3I0OTNtdmdfZg=="  # vom Nutzer vorgegeben
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Auswahl für Psychotherapie: Verfahren
+verfahren_options = {
+    "Analytische Psychotherapie": "A",
+    "Systemische Therapie": "S",
+    "Tiefenpsychologisch fundierte Psychotherapie": "T",
+    "Verhaltenstherapie": "V"
+}
+
+# Auswahl für Psychotherapie: Altersgruppe
+altersgruppe_options = {
+    "Erwachsen": "E",
+    "Kinder & Jugend": "K"
+}
+
+# Auswahl für Psychotherapie: Setting
+setting_options = {
+    "Einzeltherapie": "E",
+    "Gruppentherapie": "G"
+}
+
+
+# --- req-val Generator (Port der JS-Funktion), wie vorgeschlagen ---
+def c(e: float, t: float):
+    e += 1.1
+    [r, a] = str(e).split('.')
+    n = r[len(r) - 1]
+
+    t += 2.3
+    [l, c_] = str(t).split('.')
+    o = l[len(l) - 1]
+
+    s = "000" # time seems not to be checked
+
+    d = n + s[len(s) - 1] + o + s[len(s) - 2] + a[0] + s[len(s) - 3] + c_[0]
+    return base64.b64encode(d.encode("utf-8"))
+
+
+def build_headers(lat: float, lon: float) -> dict:
+    # req-val aus lat/lon erzeugen (Bytes -> String)
+    req_val_final = c(float(lat), float(lon)).decode("utf-8")
+    return {
+        "Host": API_HOST,
+        "User-Agent": USER_AGENT,
+        "req-val": req_val_final,
+        "Authorization": f"Basic {AUTH_CODE_BASE64}"
+    }
+
+
+def build_payload(lat: float, lon: float, ptv: str, pta: str, pts: str, r: int = 900) -> dict:
+    return {
+        "r": r,
+        "lat": lat,
+        "lon": lon,
+        "filterSelections": [
+            {"title": "Fachgebiet Kategorie", "fieldName": "fgg", "selectedCodes": ["12"]},
+            {"title": "Psychotherapie: Verfahren", "fieldName": "ptv", "selectedCodes": [ptv]},
+            {"title": "Psychotherapie: Altersgruppe", "fieldName": "pta", "selectedCodes": [pta]},
+            {"title": "Psychotherapie: Setting", "fieldName": "pts", "selectedCodes": [pts]}
+        ],
+        "locOrigin": "USER_INPUT",
+        "initialSearch": True,
+        "viaDeeplink": False
+    }
+
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ApiError(Exception):
+    """Anfrage an 116117 fehlgeschlagen (nach allen Wiederholungen) oder Antwort unbrauchbar."""
+
+
+class RateLimiter:
+    """Einfacher Mindestabstand zwischen zwei Anfragen an denselben Host (thread-sicher)."""
+
+    def __init__(self, per_second: float):
+        self._next = 0.0
+        self._lock = threading.Lock()
+        self.set_rate(per_second)
+
+    def set_rate(self, per_second: float) -> None:
+        with self._lock:
+            self.interval = 1.0 / per_second if per_second > 0 else 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ApiClient:
+    """Thread-sicherer Client mit Connection-Pool, Timeouts und Retries."""
+
+    def __init__(self, url: str = API_URL, connect_timeout: float = 5, read_timeout: float = 30,
+                 retries: int = 3, backoff: float = 0.5, pool_maxsize: int = 10):
+        import requests  # erst beim ersten Client laden
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING})
+
+    def _post(self, lat: float, lon: float, payload: dict, limiter: RateLimiter | None):
+        import requests
+
+        try:
+            with timed("req_val"):
+                headers = build_headers(lat, lon)
+        except Exception as e:
+            raise ApiError(f"Fehler bei der req-val Generierung: {e}") from e
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                limiter.wait()
+            try:
+                # Slot nur für den Versuch selbst – Rate-Limit und Backoff warten außerhalb
+                with upstream_slot(), timed("upstream_post", attempt=attempt):
+                    response = self.session.post(self.url, headers=headers, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    response.raise_for_status()  # Prüft auf HTTP-Fehlerstatus
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.retries:
+                    raise ApiError(f"Fehler bei der Anfrage: {e}") from e
+            except requests.exceptions.RequestException as e:
+                raise ApiError(f"Fehler bei der Anfrage: {e}") from e
+            # Exponentielles Backoff mit Jitter, damit parallele Aufrufer nicht im Gleichschritt wiederholen
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def fetch(self, lat: float, lon: float, ptv: str, pta: str, pts: str, r: int = 900,
+              limiter: RateLimiter | None = None) -> list[dict]:
+        """Führt die Suche aus und gibt ``arztPraxisDatas`` zurück; wirft :class:`ApiError`."""
+        response = self._post(lat, lon, build_payload(lat, lon, ptv, pta, pts, r), limiter)
+        observe_payload_bytes("upstream", len(response.content))
+        try:
+            with timed("json_parse"):
+                response_data = response.json()
+        except ValueError as e:
+            raise ApiError(f"Fehler beim Parsen der Antwort: {e}") from e
+        if "arztPraxisDatas" not in response_data:
+            raise ApiError("Antwort enthält keine 'arztPraxisDatas'.")
+        return response_data["arztPraxisDatas"]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client() -> ApiClient:
+    """Liefert den prozessweit geteilten Client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApiClient(url=os.environ.get("ARZTSUCHE_API_URL") or API_URL)
+    return _client
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host: str | None = None) -> RateLimiter:
+    """Prozessweiter Limiter je Host (Standard: Host des konfigurierten Endpunkts).
+
+    Alle Sammelabrufe im Prozess – Seite, CLI, gleichzeitige Sessions – teilen ihn.
+    """
+    host = host or urlsplit(os.environ.get("ARZTSUCHE_API_URL") or API_URL).netloc
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(
+                host, RateLimiter(float(os.environ.get("ARZTSUCHE_UPSTREAM_RATE", 2.0))))
+    return limiter
@@ -0,0 +1,128 @@
+"""Sammelexport für mehrere PLZ bzw. einen PLZ-Bereich.
+
+Die Anfragen laufen parallel (begrenzter Thread-Pool) über den gemeinsamen
+:class:`~arztsuche.api.ApiClient` und sind pro Host gedrosselt. Praxen
+werden über ihre ``id`` zusammengeführt und in eine gemeinsame Datei geschrieben
+(Format über ``--format`` oder die Dateiendung: xlsx, csv, parquet, json, ics).
+
+Aufruf ohne Streamlit::
+
+    python -m arztsuche.batch 10115 10117 --prefix 104 --verfahren V -o berlin.xlsx
+    python -m arztsuche.batch 10115 -o anrufzeiten.ics
+"""
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from arztsuche.api import altersgruppe_options, get_rate_limiter, setting_options, verfahren_options
+from arztsuche.plz_index import get_plz_index
+from arztsuche.search import umkreissuche
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_plzs(plzs=(), prefix: str | None = None) -> list[str]:
+    """PLZ-Liste + optionaler Präfix -> eindeutige, bekannte PLZ (Reihenfolge bleibt erhalten)."""
+    index = get_plz_index()
+    result = [str(p).strip() for p in plzs if str(p).strip()]
+    if prefix:
+        result.extend(index.with_prefix(prefix))
+    return list(dict.fromkeys(result))
+
+
+def run_batch(plzs: list[str], ptv: str, pta: str, pts: str, radius_km: float,
+              max_workers: int = 4, on_progress=None):
+    """Sucht für alle PLZ und gibt (Praxen ohne Duplikate, {PLZ: Fehlermeldung}) zurück.
+
+    ``distance`` jeder Praxis ist die Entfernung zur nächstgelegenen gesuchten PLZ.
+    Gedrosselt über den prozessweiten Limiter je Host (:func:`~arztsuche.api.get_rate_limiter`).
+    """
+    index = get_plz_index()
+    limiter = get_rate_limiter()
+
+    fehler = {}
+    jobs = {}
+    for plz in plzs:
+        coords = index.lookup(plz)
+        if coords is None:
+            fehler[plz] = "PLZ unbekannt"
+        else:
+            jobs[plz] = coords
+
+    def search(plz):
+        lat, lon = jobs[plz]
+        return umkreissuche(lat, lon, radius_km, ptv, pta, pts, limiter=limiter)[0]
+
+    praxen = {}
+    erledigt = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(search, plz): plz for plz in jobs}
+        for future in as_completed(futures):
+            plz = futures[future]
+            erledigt += 1
+            try:
+                daten = future.result()
+            except Exception as e:
+                logger.warning("Suche für PLZ %s fehlgeschlagen: %s", plz, e)
+                fehler[plz] = str(e)
+                daten = []
+            for a in daten:
+                praxis_key = a.get("id") or (a.get("name"), a.get("tel"))
+                bisher = praxen.get(praxis_key)
+                if bisher is None or a.get("distance", 0) < bisher.get("distance", 0):
+                    praxen[praxis_key] = a
+            if on_progress is not None:
+                on_progress(plz, erledigt, len(jobs))
+
+    arzt_praxis_daten = sorted(praxen.values(), key=lambda a: a.get("distance", 0))
+    return arzt_praxis_daten, fehler
+
+
+def main(argv=None) -> int:
+    from arztsuche.export import EXPORTER, export_bytes
+    from arztsuche.schedule import build_schedules
+
+    parser = argparse.ArgumentParser(description="Sammelexport von arztsuche.116117.de für mehrere PLZ.")
+    parser.add_argument("plz", nargs="*", help="Postleitzahlen")
+    parser.add_argument("--prefix", help="alle PLZ mit diesem Präfix (aus plz_geocoord.csv)")
+    parser.add_argument("--radius", type=float, default=25, help="Suchradius in km (Standard: 25)")
+    parser.add_argument("--verfahren", choices=sorted(verfahren_options.values()), default="A")
+    parser.add_argument("--altersgruppe", choices=sorted(altersgruppe_options.values()), default="E")
+    parser.add_argument("--setting", choices=sorted(setting_options.values()), default="E")
+    parser.add_argument("--workers", type=int, default=4, help="parallele Anfragen (Standard: 4)")
+    parser.add_argument("--rate", type=float,
+                        help="max. Anfragen pro Sekunde (Standard: ARZTSUCHE_UPSTREAM_RATE bzw. 2)")
+    parser.add_argument("-o", "--output", default="116117_sammelexport.xlsx")
+    parser.add_argument("--format", choices=sorted(EXPORTER),
+                        help="Exportformat (Standard: aus der Dateiendung von --output, sonst xlsx)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    plzs = resolve_plzs(args.plz, args.prefix)
+    if not plzs:
+        parser.error("Bitte mindestens eine PLZ oder --prefix angeben.")
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in EXPORTER:
+        fmt = "xlsx"
+    if not EXPORTER[fmt].available():
+        parser.error(f"Format {fmt} ist nicht verfügbar (fehlende Abhängigkeit).")
+
+    if args.rate:
+        get_rate_limiter().set_rate(args.rate)
+    arzt_praxis_daten, fehler = run_batch(
+        plzs, args.verfahren, args.altersgruppe, args.setting, args.radius,
+        max_workers=args.workers,
+        on_progress=lambda plz, n, total: logger.info("%s fertig (%d/%d)", plz, n, total),
+    )
+    with open(args.output, "wb") as f:
+        f.write(export_bytes(fmt, arzt_praxis_daten, build_schedules(arzt_praxis_daten)))
+    logger.info("%d Praxen aus %d PLZ -> %s", len(arzt_praxis_daten), len(plzs), args.output)
+    for plz, msg in fehler.items():
+        logger.warning("PLZ %s: %s", plz, msg)
+    return 1 if fehler and len(fehler) == len(plzs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Gemeinsamer Antwort-Cache für ``arztsuche.116117.de/api/data``.
+
+Schlüssel ist (lat, lon, r, ptv, pta, pts); ``r`` ist der bei 116117 angefragte
+Radius in km. Kleinere Radien um denselben Punkt beantwortet der räumliche Index
+(:mod:`arztsuche.spatial`) ohne neuen Cache-Eintrag.
+
+Konfiguration über Umgebungsvariablen:
+    ARZTSUCHE_CACHE_TTL   Gültigkeit in Sekunden (Standard: 3600)
+    ARZTSUCHE_CACHE_MAX   maximale Anzahl Einträge im Speicher (Standard: 128)
+    ARZTSUCHE_CACHE_DB    Pfad zu einer SQLite-Datei für den optionalen Disk-Cache
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(lat: float, lon: float, ptv: str, pta: str, pts: str, r: int = 900) -> tuple:
+    # Koordinaten runden, damit Float-Rauschen nicht zu Cache-Fehlschlägen führt
+    return (round(float(lat), 5), round(float(lon), 5), r, ptv, pta, pts)
+
+
+class ResponseCache:
+    """Thread-sicherer LRU-Cache mit TTL und optionaler SQLite-Stufe."""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 128, db_path: str | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()  # key -> (zeitstempel, daten)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS api_cache ("
+                " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: tuple):
+        """Gibt die gecachten Daten zurück oder None, falls nicht vorhanden/abgelaufen."""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[1]
+
+    def get_entry(self, key: tuple):
+        """Wie :meth:`get`, aber als (Zeitpunkt der Ablage, Daten)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT stored_at, data FROM api_cache WHERE key = ?", (json.dumps(key),)
+            ).fetchone()
+            if row is None or now - row[0] > self.ttl:
+                return None
+            data = json.loads(row[1])
+            self._store(key, row[0], data)
+            return row[0], data
+
+    def put(self, key: tuple, data) -> float:
+        """Legt ``data`` ab und gibt den Zeitpunkt der Ablage zurück."""
+        now = time.time()
+        with self._lock:
+            self._store(key, now, data)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO api_cache (key, stored_at, data) VALUES (?, ?, ?)",
+                    (json.dumps(key), now, json.dumps(data)),
+                )
+                self._db.execute("DELETE FROM api_cache WHERE stored_at < ?", (now - self.ttl,))
+                self._db.commit()
+        return now
+
+    def _store(self, key: tuple, stored_at: float, data) -> None:
+        self._entries[key] = (stored_at, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM api_cache")
+                self._db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Liefert den prozessweiten Cache (Konfiguration aus den Umgebungsvariablen)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    ttl=float(os.environ.get("ARZTSUCHE_CACHE_TTL", 3600)),
+                    max_entries=int(os.environ.get("ARZTSUCHE_CACHE_MAX", 128)),
+                    db_path=os.environ.get("ARZTSUCHE_CACHE_DB") or None,
+                )
+    return _cache
@@ -0,0 +1,104 @@
+"""Vektorisierte Auswertung der Telefonzeiten über alle Praxen einer Suche.
+
+Alle Intervalle eines Suchergebnisses liegen in flachen NumPy-Arrays
+(Praxis-Index, Wochentag, Start-/End-Minute). "Wer ist jetzt erreichbar?" ist
+damit eine einzige Maske, "nächste K Zeitfenster" ein ``argpartition`` statt
+einer vollständigen Sortierung.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from arztsuche.schedule import _norm_tel, _seconds_of_day
+
+_MIN_PER_DAY = 24 * 60
+
+
+class WindowTable:
+    """Flache Intervall-Tabelle; wird einmal pro Suche aus den Schedules gebaut."""
+
+    __slots__ = ("n_practices", "practice", "weekday", "start", "end")
+
+    def __init__(self, n_practices, practice, weekday, start, end):
+        self.n_practices = n_practices
+        self.practice = practice
+        self.weekday = weekday
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_schedules(cls, arzt_liste: list[dict], schedules: list) -> "WindowTable":
+        practice, weekday, start, end, group = [], [], [], [], []
+        groups = {}
+        for i, (a, schedule) in enumerate(zip(arzt_liste, schedules)):
+            # Gleiche Praxis (id, Name, Telefon) mehrfach in der Antwort -> gleiche Gruppe
+            g = groups.setdefault(
+                (a.get("id", "") or "", (a.get("name", "") or "").strip(), _norm_tel(a.get("tel", ""))),
+                len(groups),
+            )
+            for day, s, e in schedule.windows:
+                practice.append(i)
+                weekday.append(day)
+                start.append(s)
+                end.append(e)
+                group.append(g)
+
+        practice = np.asarray(practice, dtype=np.int32)
+        weekday = np.asarray(weekday, dtype=np.int8)
+        start = np.asarray(start, dtype=np.int16)
+        end = np.asarray(end, dtype=np.int16)
+
+        # Doppelte Intervalle derselben Praxis-Gruppe nur einmal behalten (erstes Vorkommen)
+        key = ((np.asarray(group, dtype=np.int64) * 7 + weekday) * _MIN_PER_DAY + start) * _MIN_PER_DAY + end
+        _, first = np.unique(key, return_index=True)
+        keep = np.sort(first)
+        return cls(len(arzt_liste), practice[keep], weekday[keep], start[keep], end[keep])
+
+    def __len__(self):
+        return len(self.practice)
+
+    def reachable_mask(self, now_dt: datetime) -> np.ndarray:
+        """Bool-Array je Praxis: jetzt telefonisch erreichbar?"""
+        now_s = _seconds_of_day(now_dt)
+        rows = (
+            (self.weekday == now_dt.weekday())
+            & (self.start.astype(np.int32) * 60 <= now_s)
+            & (now_s <= self.end.astype(np.int32) * 60)
+        )
+        mask = np.zeros(self.n_practices, dtype=bool)
+        mask[self.practice[rows]] = True
+        return mask
+
+    def next_windows(self, arzt_liste: list[dict], now_dt: datetime, k: int = 5) -> list[dict]:
+        """Die nächsten ``k`` Zeitfenster mit Start nach ``now_dt`` (bis 7 Tage voraus)."""
+        if k <= 0 or len(self) == 0:
+            return []
+        offset = (self.weekday.astype(np.int64) - now_dt.weekday()) % 7
+        start_s = offset * 86400 + self.start.astype(np.int64) * 60
+        # NUR echte Zukunft: Start > jetzt (keine laufenden Slots)
+        candidates = np.flatnonzero(start_s > _seconds_of_day(now_dt))
+        if len(candidates) == 0:
+            return []
+        # Eindeutiger Schlüssel (Startzeit, Zeilenindex) -> gleiche Reihenfolge wie eine stabile Sortierung
+        order_key = start_s[candidates] * len(self) + candidates
+        if len(candidates) > k:
+            part = np.argpartition(order_key, k - 1)[:k]
+            candidates, order_key = candidates[part], order_key[part]
+        top = candidates[np.argsort(order_key)]
+
+        tz = ZoneInfo("Europe/Berlin")
+        results = []
+        for row in top:
+            a = arzt_liste[self.practice[row]]
+            day_dt = (now_dt + timedelta(days=int(offset[row]))).date()
+            s, e = int(self.start[row]), int(self.end[row])
+            results.append({
+                "Start": datetime.combine(day_dt, time(s // 60, s % 60), tzinfo=tz),
+                "Ende": datetime.combine(day_dt, time(e // 60, e % 60), tzinfo=tz),
+                "Name": a.get("name", "") or "",
+                "Telefon": a.get("tel", "") or "",
+                "Ort": a.get("ort", "") or "",
+                "PLZ": a.get("plz", "") or ""
+            })
+        return results
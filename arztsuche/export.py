@@ -0,0 +1,351 @@
+"""Exporte eines Suchergebnisses: Excel, CSV, Parquet, JSON und iCalendar.
+
+Alle Formate sind :class:`Exporter` in ``EXPORTER`` und werden bei Bedarf aus
+denselben, bereits geladenen Daten erzeugt (kein erneuter Abruf). Geschrieben
+wird zeilenweise in einen Puffer pro Export – die Arbeitsmappe im write-only-Modus
+von openpyxl, kein gemeinsamer Dateipfad, kein Zwischenspeichern auf der Platte.
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from arztsuche.anrufplan import build_anrufplan
+from arztsuche.metrics import observe_payload_bytes, timed
+from arztsuche.schedule import _norm_tel, zeit_sort_key
+
+WOCHENTAGE = {"Mo.": "Mo", "Di.": "Di", "Mi.": "Mi", "Do.": "Do", "Fr.": "Fr", "Sa.": "Sa", "So.": "So"}
+WOCHENTAGE_KURZ = list(WOCHENTAGE.values())  # Index = datetime.weekday()
+
+PRAXIS_HEADER = ["id", "name", "tel", "geschlecht", "strasse", "hausnummer", "plz", "ort", "email", "distanz in meter von plz", "web", "telefonische_sprechzeiten"]
+SPRECHZEITEN_HEADER = ["Wochentag", "Uhrzeit", "Arzt / Ärztin", "Telefon"]
+ANRUFPLAN_HEADER = ["Schritt", "Wochentag", "Zeitblock", "Neu erreichbar", "Arzt / Ärztin"]
+
+# Wenige Worker reichen: der Export ist CPU-gebunden und soll nur den Script-Thread entlasten
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+
+def _praxis_label(arzt: dict) -> str:
+    return f"{arzt.get('name', 'Unbekannt')} (Tel: {arzt.get('tel', 'Nicht angegeben')})"
+
+
+def praxis_zeile(arzt: dict, schedule) -> list:
+    """Eine Zeile der Praxisliste in der Reihenfolge von ``PRAXIS_HEADER`` (Excel, CSV, Parquet, JSON)."""
+    telefonische_sprechzeiten = {f"{WOCHENTAGE_KURZ[day]} {zeit} Uhr" for day, zeit in schedule.entries}
+    return [
+        arzt.get("id", ""), arzt.get("name", ""), arzt.get("tel", ""),
+        arzt.get("geschlecht", ""), arzt.get("strasse", ""), str(arzt.get("hausnummer", "")),
+        arzt.get("plz", ""), arzt.get("ort", ""), arzt.get("email", ""),
+        arzt.get("distance", ""), arzt.get("web", ""),
+        ", ".join(telefonische_sprechzeiten)
+    ]
+
+
+_HAUSNUMMER = PRAXIS_HEADER.index("hausnummer")
+
+
+def _excel_zeile(zeile: list) -> list:
+    """Hausnummern wie "12 a" oder "3-5" in Anführungszeichen, damit Excel sie nicht als Datum/Zahl deutet."""
+    hausnummer = zeile[_HAUSNUMMER]
+    if " " in hausnummer or "-" in hausnummer:
+        zeile[_HAUSNUMMER] = f'"{hausnummer}"'
+    return zeile
+
+
+def build_workbook(arzt_praxis_daten: list[dict], schedules: list, fileobj, on_stage=None, anrufplan=None):
+    """Schreibt die Excel-Datei nach ``fileobj`` und meldet den Fortschritt über ``on_stage(text, anteil)``.
+
+    ``anrufplan``: bereits berechneter Plan für dieselben Daten (z.B. ``Suchergebnis.anrufplan``);
+    nur wenn er fehlt, wird er hier erstellt.
+    """
+    def stage(text, anteil):
+        if on_stage is not None:
+            on_stage(text, anteil)
+
+    import openpyxl  # erst beim tatsächlichen Export laden (spart Kaltstart)
+
+    stage("Praxisdaten werden geschrieben …", 0.0)
+    with timed("workbook_build", practices=len(arzt_praxis_daten)):
+        wb = openpyxl.Workbook(write_only=True)
+        ws_praxis = wb.create_sheet("Praxisdaten")
+        ws_praxis.append(PRAXIS_HEADER)
+        ws_sprechzeiten = wb.create_sheet("Telefonsprechzeiten")
+        ws_sprechzeiten.append(SPRECHZEITEN_HEADER)
+        sprechzeiten_dict = {day: {} for day in WOCHENTAGE.values()}
+
+        for arzt, schedule in zip(arzt_praxis_daten, schedules):
+            ws_praxis.append(_excel_zeile(praxis_zeile(arzt, schedule)))
+            for day, zeit in schedule.entries:
+                sprechzeiten_dict[WOCHENTAGE_KURZ[day]].setdefault(zeit, set()).add(_praxis_label(arzt))
+
+        stage("Telefonsprechzeiten werden geschrieben …", 0.5)
+        for wochentag, zeiten in sprechzeiten_dict.items():
+            sorted_zeiten = sorted(zeiten.items(), key=lambda x: zeit_sort_key(x[0]))
+            for zeit, aerzte in sorted_zeiten:
+                ws_sprechzeiten.append([wochentag, zeit, ", ".join(aerzte)])
+
+        stage("Anrufplan wird erstellt …", 0.7)
+        ws_anrufplan = wb.create_sheet("Anrufplan")
+        ws_anrufplan.append(ANRUFPLAN_HEADER)
+        plan = anrufplan if anrufplan is not None else build_anrufplan(arzt_praxis_daten, schedules)
+        for schritt, (block, neu) in enumerate(plan.route, start=1):
+            ws_anrufplan.append([
+                schritt, WOCHENTAGE_KURZ[block.weekday], block.zeit, len(neu),
+                ", ".join(_praxis_label(arzt_praxis_daten[i]) for i in neu)
+            ])
+        if plan.ohne_zeiten:
+            ws_anrufplan.append([
+                None, None, "ohne Telefonzeit", len(plan.ohne_zeiten),
+                ", ".join(_praxis_label(arzt_praxis_daten[i]) for i in plan.ohne_zeiten)
+            ])
+
+    stage("Excel-Datei wird gespeichert …", 0.85)
+    with timed("workbook_save"):
+        wb.save(fileobj)
+    stage("Excel-Datei ist fertig.", 1.0)
+    return fileobj
+
+
+def workbook_bytes(arzt_praxis_daten: list[dict], schedules: list, on_stage=None, anrufplan=None) -> bytes:
+    """Excel-Datei als Bytes (eigener Puffer pro Aufruf, direkt für ``st.download_button``)."""
+    buffer = io.BytesIO()
+    build_workbook(arzt_praxis_daten, schedules, buffer, on_stage, anrufplan)
+    observe_payload_bytes("xlsx", buffer.tell())
+    return buffer.getvalue()
+
+
+class Exporter(ABC):
+    """Ein Exportformat; ``write`` schreibt das Ergebnis binär nach ``fileobj``.
+
+    ``anrufplan`` ist ein optional schon berechneter Anrufplan; Formate ohne Anrufplan ignorieren ihn.
+    """
+
+    name = ""
+    label = ""
+    suffix = ""
+    mime = "application/octet-stream"
+
+    def available(self) -> bool:
+        """False, wenn eine optionale Abhängigkeit fehlt."""
+        return True
+
+    @abstractmethod
+    def write(self, arzt_praxis_daten: list[dict], schedules: list, fileobj, on_stage=None, anrufplan=None) -> None:
+        ...
+
+
+EXPORTER: dict[str, Exporter] = {}
+
+
+def register(exporter_cls):
+    """Klassen-Dekorator: Format unter ``exporter_cls.name`` verfügbar machen."""
+    EXPORTER[exporter_cls.name] = exporter_cls()
+    return exporter_cls
+
+
+def available_exporters() -> list[Exporter]:
+    return [e for e in EXPORTER.values() if e.available()]
+
+
+def export_bytes(fmt: str, arzt_praxis_daten: list[dict], schedules: list, on_stage=None, anrufplan=None) -> bytes:
+    """Export im Format ``fmt`` (Schlüssel in ``EXPORTER``) als Bytes."""
+    exporter = EXPORTER[fmt]
+    buffer = io.BytesIO()
+    with timed(f"export_{fmt}", practices=len(arzt_praxis_daten)):
+        exporter.write(arzt_praxis_daten, schedules, buffer, on_stage, anrufplan)
+    observe_payload_bytes(fmt, buffer.tell())
+    return buffer.getvalue()
+
+
+@register
+class XlsxExporter(Exporter):
+    name = "xlsx"
+    label = "Excel"
+    suffix = ".xlsx"
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def write(self, arzt_praxis_daten, schedules, fileobj, on_stage=None, anrufplan=None):
+        build_workbook(arzt_praxis_daten, schedules, fileobj, on_stage, anrufplan)
+
+
+@register
+class CsvExporter(Exporter):
+    """Praxisliste als CSV (Semikolon, UTF-8 mit BOM – öffnet so direkt in Excel)."""
+
+    name = "csv"
+    label = "CSV"
+    suffix = ".csv"
+    mime = "text/csv"
+
+    def write(self, arzt_praxis_daten, schedules, fileobj, on_stage=None, anrufplan=None):
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        writer = csv.writer(text, delimiter=";")
+        writer.writerow(PRAXIS_HEADER)
+        writer.writerows(praxis_zeile(arzt, schedule) for arzt, schedule in zip(arzt_praxis_daten, schedules))
+        text.flush()
+        text.detach()  # fileobj gehört dem Aufrufer
+
+
+@register
+class ParquetExporter(Exporter):
+    """Praxisliste als Parquet (benötigt pyarrow; Entfernung als Zahl, alles andere Text)."""
+
+    name = "parquet"
+    label = "Parquet"
+    suffix = ".parquet"
+    mime = "application/vnd.apache.parquet"
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("pyarrow") is not None
+
+    def write(self, arzt_praxis_daten, schedules, fileobj, on_stage=None, anrufplan=None):
+        import pyarrow as pa  # optional, erst beim Export laden
+        import pyarrow.parquet as pq
+
+        spalten = {feld: [] for feld in PRAXIS_HEADER}
+        for arzt, schedule in zip(arzt_praxis_daten, schedules):
+            for feld, wert in zip(PRAXIS_HEADER, praxis_zeile(arzt, schedule)):
+                spalten[feld].append(wert)
+        distanz = "distanz in meter von plz"
+        table = pa.table({
+            feld: (pa.array([None if w == "" else float(w) for w in werte], type=pa.float64())
+                   if feld == distanz else pa.array(["" if w is None else str(w) for w in werte], type=pa.string()))
+            for feld, werte in spalten.items()
+        })
+        pq.write_table(table, fileobj, compression="zstd")
+
+
+@register
+class JsonExporter(Exporter):
+    """Praxisliste als JSON-Array; Telefonzeiten zusätzlich strukturiert (Tag, von, bis)."""
+
+    name = "json"
+    label = "JSON"
+    suffix = ".json"
+    mime = "application/json"
+
+    def write(self, arzt_praxis_daten, schedules, fileobj, on_stage=None, anrufplan=None):
+        text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+        text.write("[")
+        for n, (arzt, schedule) in enumerate(zip(arzt_praxis_daten, schedules)):
+            eintrag = dict(zip(PRAXIS_HEADER, praxis_zeile(arzt, schedule)))
+            eintrag["telefonfenster"] = [
+                {"tag": WOCHENTAGE_KURZ[day], "von": f"{start // 60:02d}:{start % 60:02d}",
+                 "bis": f"{end // 60:02d}:{end % 60:02d}"}
+                for day, start, end in schedule.windows
+            ]
+            text.write(",\n" if n else "\n")
+            text.write(json.dumps(eintrag, ensure_ascii=False))
+        text.write("\n]\n")
+        text.flush()
+        text.detach()  # fileobj gehört dem Aufrufer
+
+
+_ICS_TAGE = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_ICS_VTIMEZONE = (
+    "BEGIN:VTIMEZONE", "TZID:Europe/Berlin",
+    "BEGIN:DAYLIGHT", "TZOFFSETFROM:+0100", "TZOFFSETTO:+0200", "TZNAME:CEST",
+    "DTSTART:19700329T020000", "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU", "END:DAYLIGHT",
+    "BEGIN:STANDARD", "TZOFFSETFROM:+0200", "TZOFFSETTO:+0100", "TZNAME:CET",
+    "DTSTART:19701025T030000", "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU", "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def _ics_text(value) -> str:
+    return (str(value or "").replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> bytes:
+    """Zeilen nach RFC 5545 auf 75 Oktette falten (ohne UTF-8-Zeichen zu zerteilen)."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    out, chunk, size = [], [], 0
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > 75:
+            out.append("".join(chunk))
+            chunk, size = [" "], 1
+        chunk.append(ch)
+        size += n
+    out.append("".join(chunk))
+    return ("\r\n".join(out) + "\r\n").encode("utf-8")
+
+
+@register
+class IcsExporter(Exporter):
+    """Wöchentlich wiederkehrende Telefonzeiten als Kalender-Feed (eine Serie je Praxis und Fenster)."""
+
+    name = "ics"
+    label = "Kalender (iCal)"
+    suffix = ".ics"
+    mime = "text/calendar"
+
+    def write(self, arzt_praxis_daten, schedules, fileobj, on_stage=None, anrufplan=None):
+        heute = datetime.now(ZoneInfo("Europe/Berlin")).date()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//arztsuche//Telefonsprechzeiten//DE",
+                 "CALSCALE:GREGORIAN", "X-WR-CALNAME:Telefonsprechzeiten", *_ICS_VTIMEZONE]
+        fileobj.write(b"".join(_ics_fold(line) for line in lines))
+
+        seen = set()  # gleiche Praxis (id, Name, Telefon) + gleiches Fenster nur einmal
+        for arzt, schedule in zip(arzt_praxis_daten, schedules):
+            praxis = (arzt.get("id", "") or "", (arzt.get("name", "") or "").strip(), _norm_tel(arzt.get("tel", "")))
+            ort = " ".join(str(arzt.get(f, "") or "") for f in ("strasse", "hausnummer", "plz", "ort")).strip()
+            for day, start, end in schedule.windows:
+                if end <= start or (praxis, day, start, end) in seen:
+                    continue
+                seen.add((praxis, day, start, end))
+                tag = heute + timedelta(days=(day - heute.weekday()) % 7)  # nächstes Vorkommen
+                uid = hashlib.sha1(repr((praxis, day, start, end)).encode()).hexdigest()[:20]
+                event = [
+                    "BEGIN:VEVENT",
+                    f"UID:{uid}@arztsuche",
+                    f"DTSTAMP:{stamp}",
+                    f"DTSTART;TZID=Europe/Berlin:{tag:%Y%m%d}T{start // 60:02d}{start % 60:02d}00",
+                    f"DTEND;TZID=Europe/Berlin:{tag:%Y%m%d}T{end // 60:02d}{end % 60:02d}00",
+                    f"RRULE:FREQ=WEEKLY;BYDAY={_ICS_TAGE[day]}",
+                    f"SUMMARY:{_ics_text('Anrufen: ' + (arzt.get('name', '') or ''))}",
+                    f"DESCRIPTION:{_ics_text('Tel: ' + (arzt.get('tel', '') or ''))}",
+                    f"LOCATION:{_ics_text(ort)}",
+                    "END:VEVENT",
+                ]
+                fileobj.write(b"".join(_ics_fold(line) for line in event))
+        fileobj.write(_ics_fold("END:VCALENDAR"))
+
+
+class ExportJob:
+    """Handle auf einen laufenden Export inkl. aktuellem Fortschritt."""
+
+    def __init__(self):
+        self.stage = "Export wird vorbereitet …"
+        self.fraction = 0.0
+        self.future = None
+        self._lock = threading.Lock()
+
+    def _on_stage(self, text: str, anteil: float) -> None:
+        with self._lock:
+            self.stage = text
+            self.fraction = anteil
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+
+def submit_workbook(arzt_praxis_daten: list[dict], schedules: list, anrufplan=None) -> ExportJob:
+    """Startet den Export im Hintergrund und gibt sofort zurück; ``result()`` liefert die Bytes."""
+    job = ExportJob()
+    job.future = _executor.submit(workbook_bytes, arzt_praxis_daten, schedules, job._on_stage, anrufplan)
+    return job
+
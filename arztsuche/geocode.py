@@ -0,0 +1,114 @@
+"""Lokale Geokodierung der Praxisadressen – ohne Netzwerkaufrufe je Marker.
+
+Reihenfolge je Praxis:
+
+1. Koordinaten aus der 116117-Antwort (``lat``/``lon``),
+2. gleiche Adresse (PLZ, Straße, Hausnummer) schon einmal mit Koordinaten gesehen,
+3. Mittelpunkt aller bekannten Adressen derselben Straße in der PLZ,
+4. Mittelpunkt der PLZ aus ``plz_geocoord.csv``.
+
+Stufe 2 und 3 lernt der prozessweite :class:`Geocoder` aus allen bisherigen
+Suchergebnissen; er wird von allen Sessions geteilt.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from arztsuche.plz_index import get_plz_index
+
+QUELLE_116117 = "116117"
+QUELLE_ADRESSE = "Adresse"
+QUELLE_STRASSE = "Straße"
+QUELLE_PLZ = "PLZ"
+
+_STR_RE = re.compile(r"(str\.?|straße|strasse)$")
+
+
+def _norm_strasse(strasse) -> str:
+    s = " ".join(str(strasse or "").lower().split())
+    return _STR_RE.sub("str", s)
+
+
+def _norm_hausnummer(hausnummer) -> str:
+    return str(hausnummer or "").lower().replace(" ", "")
+
+
+class Geocoder:
+    """Gelernter Adress-Cache (LRU) plus Straßen-Mittelpunkte."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._adressen = OrderedDict()  # (plz, straße, hausnummer) -> (lat, lon)
+        self._strassen = {}  # (plz, straße) -> [summe lat, summe lon, anzahl]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._adressen)
+
+    def lerne(self, plz, strasse, hausnummer, lat: float, lon: float) -> None:
+        strasse = _norm_strasse(strasse)
+        key = (str(plz or "").strip(), strasse, _norm_hausnummer(hausnummer))
+        with self._lock:
+            if key in self._adressen:
+                self._adressen.move_to_end(key)
+                return
+            self._adressen[key] = (lat, lon)
+            if len(self._adressen) > self.max_entries:
+                self._adressen.popitem(last=False)
+            if strasse and ((key[0], strasse) in self._strassen or len(self._strassen) < self.max_entries):
+                summe = self._strassen.setdefault((key[0], strasse), [0.0, 0.0, 0])
+                summe[0] += lat
+                summe[1] += lon
+                summe[2] += 1
+
+    def lookup(self, plz, strasse, hausnummer):
+        """(lat, lon, quelle) für eine Adresse oder None, falls nicht einmal die PLZ bekannt ist."""
+        plz = str(plz or "").strip()
+        strasse = _norm_strasse(strasse)
+        with self._lock:
+            treffer = self._adressen.get((plz, strasse, _norm_hausnummer(hausnummer)))
+            if treffer is not None:
+                return treffer[0], treffer[1], QUELLE_ADRESSE
+            summe = self._strassen.get((plz, strasse)) if strasse else None
+            if summe is not None:
+                return summe[0] / summe[2], summe[1] / summe[2], QUELLE_STRASSE
+        coords = get_plz_index().lookup(plz)
+        if coords is None:
+            return None
+        return coords[0], coords[1], QUELLE_PLZ
+
+    def geokodieren(self, tabelle):
+        """Koordinaten aller Praxen einer :class:`~arztsuche.praxen.PraxisTabelle`.
+
+        Gibt (lat, lon, quelle) zurück; ``lat``/``lon`` sind NumPy-Arrays (NaN, wenn
+        nichts gefunden wurde), ``quelle`` eine Liste mit der verwendeten Stufe.
+        """
+        lat = np.array(tabelle.column("lat"), dtype=np.float64)
+        lon = np.array(tabelle.column("lon"), dtype=np.float64)
+        plz, strasse, hausnummer = (tabelle.column(f) for f in ("plz", "strasse", "hausnummer"))
+        bekannt = ~(np.isnan(lat) | np.isnan(lon))
+        quelle = [QUELLE_116117 if ok else None for ok in bekannt]
+
+        for i in np.flatnonzero(bekannt):
+            self.lerne(plz[i], strasse[i], hausnummer[i], float(lat[i]), float(lon[i]))
+        for i in np.flatnonzero(~bekannt):
+            treffer = self.lookup(plz[i], strasse[i], hausnummer[i])
+            if treffer is not None:
+                lat[i], lon[i], quelle[i] = treffer
+        return lat, lon, quelle
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Prozessweiter Geocoder (lernt aus allen Suchen aller Sessions)."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = Geocoder()
+    return _geocoder
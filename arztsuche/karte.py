@@ -0,0 +1,112 @@
+"""Serverseitiges Marker-Clustering für die Kartenansicht.
+
+Die Praxen werden je Zoomstufe in ein Gitter von ``CLUSTER_PX`` Bildschirmpixeln
+(Web-Mercator, 256-px-Kacheln) einsortiert; jede belegte Zelle wird zu einem
+Marker am Schwerpunkt ihrer Praxen. Der Browser bekommt so nur ein paar Dutzend
+Marker statt aller Praxen. Die Stufen werden pro Suchergebnis einmal berechnet und
+von allen Sessions geteilt.
+"""
+import math
+import threading
+import weakref
+
+import numpy as np
+
+from arztsuche.geocode import QUELLE_116117, get_geocoder
+
+TILE_PX = 256
+CLUSTER_PX = 60
+MIN_ZOOM = 3
+MAX_ZOOM = 18
+_MAX_LAT = 85.05112878
+
+
+def _pixel(lat: np.ndarray, lon: np.ndarray, zoom: int):
+    scale = TILE_PX * 2.0 ** zoom
+    x = (lon + 180.0) / 360.0 * scale
+    s = np.sin(np.radians(np.clip(lat, -_MAX_LAT, _MAX_LAT)))
+    y = (0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)) * scale
+    return x, y
+
+
+class Clusterstufe:
+    """Marker einer Zoomstufe; ``mitglieder(k)`` sind die Praxis-Indizes von Marker ``k``."""
+
+    __slots__ = ("lat", "lon", "anzahl", "_order", "_offsets")
+
+    def __init__(self, lat, lon, anzahl, order, offsets):
+        self.lat = lat
+        self.lon = lon
+        self.anzahl = anzahl
+        self._order = order
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self.anzahl)
+
+    def mitglieder(self, k: int) -> np.ndarray:
+        return self._order[self._offsets[k]:self._offsets[k + 1]]
+
+
+class KartenIndex:
+    """Geokodierte Praxen eines Suchergebnisses plus Clusterstufen (lazy, je Zoom einmal)."""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, quelle: list):
+        self.quelle = quelle
+        self.auf_karte = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.lat = lat[self.auf_karte]
+        self.lon = lon[self.auf_karte]
+        self._stufen = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.auf_karte)
+
+    def geschaetzt(self) -> int:
+        """Anzahl Praxen, deren Position nicht von 116117 stammt."""
+        return sum(1 for i in self.auf_karte if self.quelle[i] != QUELLE_116117)
+
+    def mitte(self) -> tuple[float, float]:
+        return float(np.median(self.lat)), float(np.median(self.lon))
+
+    def start_zoom(self, radius_km: float | None, breite_px: int = 700) -> int:
+        """Zoomstufe, bei der der Suchkreis etwa in ``breite_px`` Pixel passt."""
+        if not radius_km or len(self) == 0:
+            return 10
+        m_pro_px = 2 * radius_km * 1000 / breite_px
+        zoom = math.log2(156543.03 * math.cos(math.radians(self.mitte()[0])) / m_pro_px)
+        return max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+
+    def stufe(self, zoom: int) -> Clusterstufe:
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+        stufe = self._stufen.get(zoom)
+        if stufe is None:
+            with self._lock:
+                stufe = self._stufen.get(zoom)
+                if stufe is None:
+                    stufe = self._stufen[zoom] = self._cluster(zoom)
+        return stufe
+
+    def _cluster(self, zoom: int) -> Clusterstufe:
+        x, y = _pixel(self.lat, self.lon, zoom)
+        cells = np.floor(x / CLUSTER_PX).astype(np.int64) * (1 << 32) + np.floor(y / CLUSTER_PX).astype(np.int64)
+        _, inverse = np.unique(cells, return_inverse=True)
+        anzahl = np.bincount(inverse)
+        lat = np.bincount(inverse, weights=self.lat) / anzahl
+        lon = np.bincount(inverse, weights=self.lon) / anzahl
+        order = self.auf_karte[np.argsort(inverse, kind="stable")]
+        offsets = np.concatenate(([0], np.cumsum(anzahl)))
+        return Clusterstufe(lat, lon, anzahl, order, offsets)
+
+
+_indizes = weakref.WeakKeyDictionary()  # PraxisTabelle -> KartenIndex
+_indizes_lock = threading.Lock()
+
+
+def karten_index(tabelle) -> KartenIndex:
+    """Karten-Index zu einer (geteilten) :class:`~arztsuche.praxen.PraxisTabelle`; einmal pro Tabelle."""
+    with _indizes_lock:
+        index = _indizes.get(tabelle)
+        if index is None:
+            index = _indizes[tabelle] = KartenIndex(*get_geocoder().geokodieren(tabelle))
+    return index
@@ -0,0 +1,161 @@
+"""Kontakt-Status je Praxis und Tag (SQLite) – Grundlage für Anrufliste, Warteliste und Nachweis.
+
+Jede Änderung ("Nicht Erreicht", "Auf AB gesprochen", "Auf Warteliste", Notiz) wird
+als neue Zeile an ``kontakt_log`` angehängt; nichts wird überschrieben. Der jeweils
+letzte Stand je (Praxis, Tag) steht zusätzlich in ``kontakt_stand``, sodass eine
+Änderung ein einzelner Insert + Upsert ist und Abfragen (heutiger Stand, Warteliste,
+Nachweis über Monate) über Indizes laufen statt über ganze Excel-Dateien.
+
+Persistent nur, wenn ``ARZTSUCHE_KONTAKTE_DB`` gesetzt ist (z.B. lokal/selbst
+gehostet); sonst bekommt jede Session einen eigenen Store im Speicher, und es
+wird nichts dauerhaft abgelegt.
+"""
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+STATUS_OPTIONEN = ["Noch offen", "Nicht Erreicht", "Auf AB gesprochen", "Auf Warteliste"]
+WARTELISTE = "Auf Warteliste"
+NACHWEIS_HEADER = ["Datum", "Uhrzeit", "Praxis", "Telefon", "Ergebnis", "Notiz"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kontakt_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    praxis_id TEXT NOT NULL,
+    datum TEXT NOT NULL,
+    zeitpunkt REAL NOT NULL,
+    status TEXT NOT NULL,
+    notiz TEXT NOT NULL DEFAULT '',
+    name TEXT, tel TEXT
+);
+CREATE INDEX IF NOT EXISTS kontakt_log_praxis ON kontakt_log (praxis_id, datum);
+
+CREATE TABLE IF NOT EXISTS kontakt_stand (
+    praxis_id TEXT NOT NULL,
+    datum TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    zeitpunkt REAL NOT NULL,
+    status TEXT NOT NULL,
+    notiz TEXT NOT NULL DEFAULT '',
+    name TEXT, tel TEXT,
+    PRIMARY KEY (praxis_id, datum)
+);
+CREATE INDEX IF NOT EXISTS kontakt_stand_datum ON kontakt_stand (datum);
+CREATE INDEX IF NOT EXISTS kontakt_stand_status ON kontakt_stand (status, datum);
+"""
+
+
+def heute() -> str:
+    return datetime.now(ZoneInfo("Europe/Berlin")).date().isoformat()
+
+
+class KontaktStore:
+    """Thread-sicheres Append-only-Log der Kontaktversuche plus materialisierter letzter Stand."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def setze(self, praxis_id: str, status: str, notiz: str = "", datum: str | date | None = None,
+              name: str = "", tel: str = "") -> None:
+        """Neuer Stand für (Praxis, Tag); "Noch offen" wird als leerer Status gespeichert."""
+        datum = str(datum or heute())
+        status = "" if status == "Noch offen" else status
+        now = time.time()
+        with self._lock, self._db:
+            seq = self._db.execute(
+                "INSERT INTO kontakt_log (praxis_id, datum, zeitpunkt, status, notiz, name, tel)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (praxis_id, datum, now, status, notiz or "", name, tel),
+            ).lastrowid
+            self._db.execute(
+                "INSERT OR REPLACE INTO kontakt_stand (praxis_id, datum, seq, zeitpunkt, status, notiz, name, tel)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (praxis_id, datum, seq, now, status, notiz or "", name, tel),
+            )
+
+    def stand(self, datum: str | date | None = None) -> dict:
+        """{praxis_id: (status, notiz)} für einen Tag (Standard: heute)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT praxis_id, status, notiz FROM kontakt_stand WHERE datum = ?", (str(datum or heute()),)
+            ).fetchall()
+        return {praxis_id: (status, notiz) for praxis_id, status, notiz in rows}
+
+    def verlauf(self, praxis_id: str) -> list[tuple]:
+        """Alle Einträge einer Praxis (datum, zeitpunkt, status, notiz), älteste zuerst."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT datum, zeitpunkt, status, notiz FROM kontakt_log WHERE praxis_id = ? ORDER BY seq",
+                (praxis_id,),
+            ).fetchall()
+
+    def warteliste(self) -> list[dict]:
+        """Praxen, deren letzter Status "Auf Warteliste" ist (seit wann, letzte Notiz)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT s.praxis_id, s.name, s.tel, s.notiz,"
+                " (SELECT MIN(w.datum) FROM kontakt_stand w WHERE w.praxis_id = s.praxis_id AND w.status = ?)"
+                " FROM kontakt_stand s WHERE s.status = ?"
+                " AND s.datum = (SELECT MAX(l.datum) FROM kontakt_stand l WHERE l.praxis_id = s.praxis_id"
+                "                AND l.status != '')"
+                " ORDER BY s.datum",
+                (WARTELISTE, WARTELISTE),
+            ).fetchall()
+        return [{"praxis_id": p, "Praxis": n or "", "Telefon": t or "", "Notiz": notiz, "seit": seit}
+                for p, n, t, notiz, seit in rows]
+
+    def nachweis(self, von: str | date, bis: str | date) -> list[list]:
+        """Alle bearbeiteten Kontakte im Zeitraum (je Praxis und Tag der letzte Stand), chronologisch."""
+        tz = ZoneInfo("Europe/Berlin")
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT datum, zeitpunkt, name, tel, status, notiz FROM kontakt_stand"
+                " WHERE datum BETWEEN ? AND ? AND status != '' ORDER BY datum, zeitpunkt",
+                (str(von), str(bis)),
+            ).fetchall()
+        return [[datum, datetime.fromtimestamp(ts, tz).strftime("%H:%M"), name or "", tel or "", status, notiz]
+                for datum, ts, name, tel, status, notiz in rows]
+
+
+def nachweis_bytes(zeilen: list[list], von, bis) -> bytes:
+    """"Nachweis für die Krankenkasse" als Excel-Datei (write-only, eine Zeile je Kontakt)."""
+    import openpyxl  # erst beim tatsächlichen Export laden
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Nachweis")
+    ws.append(["Nachweis über Kontaktversuche zur Psychotherapieplatzsuche"])
+    ws.append([f"Zeitraum: {von} bis {bis}", None, None, None, f"Kontakte: {len(zeilen)}"])
+    ws.append([])
+    ws.append(NACHWEIS_HEADER)
+    for zeile in zeilen:
+        ws.append(zeile)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_kontakt_store():
+    """Prozessweiter Store oder None, wenn ``ARZTSUCHE_KONTAKTE_DB`` nicht gesetzt ist."""
+    global _store
+    path = os.environ.get("ARZTSUCHE_KONTAKTE_DB")
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KontaktStore(path)
+    return _store
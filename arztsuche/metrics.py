@@ -0,0 +1,186 @@
+"""Leichtgewichtige Latenz- und Durchsatz-Messung der Suchschritte.
+
+Jeder Schritt (PLZ-Lookup, req-val, Upstream-POST, JSON-Parsing, Radiusfilter,
+Excel-Aufbau, Speichern, Rendern) wird mit :func:`timed` gemessen. Die Werte landen
+in prozessweiten Histogrammen, werden als strukturierte Logzeile (JSON) ausgegeben
+und lassen sich mit :func:`render_prometheus` im Prometheus-Textformat abrufen –
+über ``http://<host>:<port>/metrics`` (wenn ``ARZTSUCHE_METRICS_PORT`` gesetzt ist)
+oder die Admin-Ansicht der App (nur mit ``ARZTSUCHE_METRICS_ADMIN=1``).
+
+Die Logzeilen erscheinen erst, wenn Logging konfiguriert ist – in der App über
+``ARZTSUCHE_LOG_LEVEL=INFO`` (siehe :func:`setup_logging`).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Bucket-Grenzen (obere Schranken) je Messgröße
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 500_000, 1_000_000, 5_000_000, 20_000_000)
+COUNT_BUCKETS = (0, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Sammelt Histogramme nach (Metrikname, Label-Wert)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, label) -> Histogram
+        self._meta = {}  # name -> (Hilfetext, Label-Name)
+
+    def observe(self, name: str, label: str, value: float, buckets, help_text: str = "", label_key: str = "kind") -> None:
+        with self._lock:
+            hist = self._histograms.get((name, label))
+            if hist is None:
+                hist = self._histograms[(name, label)] = Histogram(buckets)
+                self._meta.setdefault(name, (help_text, label_key))
+            hist.observe(value)
+
+    def snapshot(self) -> list[dict]:
+        """Zusammenfassung je Histogramm (für die Admin-Seite)."""
+        with self._lock:
+            return [
+                {"metrik": name, "label": label, "anzahl": h.count, "summe": h.total,
+                 "mittel": h.total / h.count if h.count else 0.0}
+                for (name, label), h in sorted(self._histograms.items())
+            ]
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            names = sorted({name for name, _ in self._histograms})
+            for name in names:
+                help_text, label_key = self._meta[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (n, label), h in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for upper, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label_key}="{label}",le="{upper}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{label_key}="{label}",le="+Inf"}} {h.count}')
+                    lines.append(f'{name}_sum{{{label_key}="{label}"}} {h.total}')
+                    lines.append(f'{name}_count{{{label_key}="{label}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = Registry()
+
+
+@contextmanager
+def timed(stage: str, **fields):
+    """Misst die Dauer eines Schritts; zusätzliche Felder erscheinen in der Logzeile."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe("arztsuche_stage_seconds", stage, seconds, LATENCY_BUCKETS,
+                         "Dauer der einzelnen Suchschritte in Sekunden", label_key="stage")
+        if logger.isEnabledFor(logging.INFO):  # JSON nur bauen, wenn die Zeile auch ausgegeben wird
+            logger.info(json.dumps({"stage": stage, "seconds": round(seconds, 6), **fields}, ensure_ascii=False))
+
+
+def observe_payload_bytes(kind: str, size: int) -> None:
+    registry.observe("arztsuche_payload_bytes", kind, size, SIZE_BUCKETS, "Größe von Antworten/Exporten in Bytes")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"payload": kind, "bytes": size}))
+
+
+def observe_practices(kind: str, count: int) -> None:
+    registry.observe("arztsuche_practices", kind, count, COUNT_BUCKETS, "Anzahl Praxen je Suche")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"practices": kind, "count": count}))
+
+
+_logging_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """Logging für das Paket ``arztsuche`` nach ``ARZTSUCHE_LOG_LEVEL`` (z.B. INFO) einrichten.
+
+    Ohne die Variable bleibt alles, wie es ist (Streamlit konfiguriert nur seine eigenen Logger).
+    """
+    level = os.environ.get("ARZTSUCHE_LOG_LEVEL", "").upper()
+    if not level:
+        return
+    pkg_logger = logging.getLogger("arztsuche")
+    with _logging_lock:
+        if not pkg_logger.handlers:  # Streamlit führt das Script bei jedem Rerun erneut aus
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+            pkg_logger.addHandler(handler)
+            pkg_logger.setLevel(level)
+
+
+def admin_enabled() -> bool:
+    """Admin-Ansicht der Metriken (inkl. Zurücksetzen) nur mit ``ARZTSUCHE_METRICS_ADMIN=1``."""
+    return os.environ.get("ARZTSUCHE_METRICS_ADMIN", "").lower() in ("1", "true", "yes")
+
+
+def render_prometheus() -> str:
+    return registry.render_prometheus()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int | None = None):
+    """Startet (einmal pro Prozess) den /metrics-Endpunkt; ohne Port/Umgebungsvariable passiert nichts."""
+    global _server
+    if port is None:
+        port = int(os.environ.get("ARZTSUCHE_METRICS_PORT", 0) or 0)
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
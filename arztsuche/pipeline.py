@@ -0,0 +1,114 @@
+"""Asynchrone Such-Pipeline mit Request-Coalescing ("single flight").
+
+Ein prozessweiter Event-Loop läuft in einem Hintergrund-Thread. Identische,
+gleichzeitig laufende Anfragen – gleiche Suche oder gleicher Upstream-Aufruf –
+teilen sich eine Ausführung und dasselbe Ergebnis. Anfragen an
+arztsuche.116117.de sind zusätzlich global begrenzt
+(``ARZTSUCHE_UPSTREAM_CONCURRENCY``, Standard 4). Ein Slot gilt je HTTP-Versuch
+(:func:`upstream_slot`); Wartezeiten für Rate-Limit und Backoff belegen keinen Slot.
+
+Die blockierenden Teile (requests, Auswertung) laufen in Thread-Pools; Aufrufer aus
+Streamlit oder Batch-Threads nutzen die synchronen Fassaden :func:`suche` bzw.
+:func:`run_upstream`.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SEARCH_TIMEOUT = 120  # Sekunden
+
+
+class Pipeline:
+    def __init__(self, max_upstream: int = 4, max_searches: int = 16):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="arztsuche-pipeline", daemon=True)
+        self._thread.start()
+        # Getrennte Pools: eine Suche wartet u.U. auf einen Upstream-Aufruf und darf ihm keinen Worker wegnehmen
+        self._search_executor = ThreadPoolExecutor(max_searches, thread_name_prefix="arztsuche-suche")
+        # Upstream-Threads dürfen (Rate-Limit, Backoff) schlafen; begrenzt werden die HTTP-Versuche selbst
+        self._upstream_executor = ThreadPoolExecutor(max_searches, thread_name_prefix="arztsuche-upstream")
+        self.upstream_slots = threading.BoundedSemaphore(max_upstream)
+        self._inflight = {}  # key -> asyncio.Task; nur im Loop-Thread verwendet
+        self.coalesced = 0  # Anzahl Aufrufe, die sich an eine laufende Ausführung angehängt haben
+
+    async def _run(self, fn, upstream: bool):
+        executor = self._upstream_executor if upstream else self._search_executor
+        return await self.loop.run_in_executor(executor, fn)
+
+    async def _coalesce(self, key, fn, upstream: bool):
+        task = self._inflight.get(key)
+        if task is None:
+            task = self.loop.create_task(self._run(fn, upstream))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: bricht ein Aufrufer ab (Timeout), läuft die Ausführung für die anderen weiter
+        return await asyncio.shield(task)
+
+    def submit(self, key, fn, upstream: bool = False):
+        """Wie :meth:`run`, gibt aber sofort ein ``concurrent.futures.Future`` zurück."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Pipeline.run darf nicht aus dem Event-Loop aufgerufen werden.")
+        return asyncio.run_coroutine_threadsafe(self._coalesce(key, fn, upstream), self.loop)
+
+    def run(self, key, fn, upstream: bool = False, timeout: float | None = SEARCH_TIMEOUT):
+        """Führt ``fn`` aus – oder wartet auf eine bereits laufende Ausführung mit gleichem ``key``."""
+        return self.submit(key, fn, upstream).result(timeout)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> Pipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = Pipeline(max_upstream=int(os.environ.get("ARZTSUCHE_UPSTREAM_CONCURRENCY", 4)))
+    return _pipeline
+
+
+def upstream_slot() -> threading.BoundedSemaphore:
+    """Globaler Slot für genau einen HTTP-Versuch an 116117 (``with upstream_slot(): ...``)."""
+    return get_pipeline().upstream_slots
+
+
+def run_upstream(key, fn):
+    """Upstream-Aufruf mit Coalescing; die globale Begrenzung greift je Versuch im :class:`ApiClient`."""
+    return get_pipeline().run(("upstream",) + tuple(key), fn, upstream=True)
+
+
+def suche(postcode: str, radius_km: float, ptv: str, pta: str, pts: str, on_stage=None):
+    """Wie :func:`arztsuche.search.suche`, aber gleichzeitige identische Suchen teilen sich ein Ergebnis.
+
+    ``on_stage(text, anteil)`` wird im Thread des Aufrufers aufgerufen (Streamlit-Elemente
+    dürfen nur dort aktualisiert werden). Nur die Session, die die Suche startet, bekommt
+    die einzelnen Schritte; angehängte Aufrufer sehen keinen Zwischenstand.
+    """
+    from arztsuche import search
+
+    key = ("suche", str(postcode).strip(), radius_km, ptv, pta, pts)
+    if on_stage is None:
+        return get_pipeline().run(key, lambda: search.suche(postcode, radius_km, ptv, pta, pts))
+
+    schritte = queue.SimpleQueue()
+    future = get_pipeline().submit(
+        key, lambda: search.suche(postcode, radius_km, ptv, pta, pts, on_stage=lambda *s: schritte.put(s)))
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    while True:
+        try:
+            ergebnis = future.result(timeout=0.1)
+            break
+        except TimeoutError:
+            if time.monotonic() > deadline:
+                raise
+        while not schritte.empty():
+            on_stage(*schritte.get())
+    while not schritte.empty():
+        on_stage(*schritte.get())
+    return ergebnis
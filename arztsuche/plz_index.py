@@ -0,0 +1,72 @@
+"""Prozessweiter Index PLZ -> (lat, lng) auf Basis von ``plz_geocoord.csv``.
+
+Die CSV wird nur einmal pro Prozess eingelesen und von allen Streamlit-Sessions
+gemeinsam genutzt. Ändert sich die Datei (mtime), wird der Index neu aufgebaut.
+"""
+import csv
+import os
+import threading
+from array import array
+
+DEFAULT_CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plz_geocoord.csv")
+
+
+class PlzIndex:
+    """Kompakter, array-basierter Index: PLZ (als String, mit führender Null) -> Zeile."""
+
+    __slots__ = ("path", "mtime", "_pos", "_plz", "_lat", "_lng")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self._pos = {}
+        self._plz = []
+        self._lat = array("d")
+        self._lng = array("d")
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Kopfzeile "plz,lat,lng"
+            for row in reader:
+                if len(row) < 3:
+                    continue
+                # PLZ bewusst als String behalten, damit z.B. "01067" exakt bleibt
+                plz = row[0].strip()
+                self._pos[plz] = len(self._plz)
+                self._plz.append(plz)
+                self._lat.append(float(row[1]))
+                self._lng.append(float(row[2]))
+
+    def __len__(self):
+        return len(self._plz)
+
+    def __contains__(self, plz) -> bool:
+        return str(plz).strip() in self._pos
+
+    def lookup(self, plz):
+        """Gibt (lat, lng) für die PLZ zurück oder None, falls unbekannt."""
+        i = self._pos.get(str(plz).strip())
+        if i is None:
+            return None
+        return self._lat[i], self._lng[i]
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        """Alle bekannten PLZ, die mit ``prefix`` beginnen (z.B. "101" für Berlin-Mitte)."""
+        prefix = str(prefix).strip()
+        return [plz for plz in self._plz if plz.startswith(prefix)]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_plz_index(path: str = DEFAULT_CSV_PATH) -> PlzIndex:
+    """Liefert den gemeinsamen Index und lädt ihn neu, wenn sich die CSV geändert hat."""
+    global _index
+    mtime = os.path.getmtime(path)
+    index = _index
+    if index is not None and index.path == path and index.mtime == mtime:
+        return index
+    with _lock:
+        if _index is None or _index.path != path or _index.mtime != mtime:
+            _index = PlzIndex(path)
+        return _index
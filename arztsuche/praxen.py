@@ -0,0 +1,115 @@
+"""Kompaktes, spaltenweises Suchergebnis.
+
+Statt der vollständigen 116117-Antwort (inkl. verschachtelter ``tsz``-Strukturen)
+hält :class:`PraxisTabelle` nur die Felder, die Anzeige und Exporte brauchen:
+Texte als Tupel mit internierten Strings, Zahlen als NumPy-Arrays. Die Tabelle
+wird nach dem Bau nicht mehr verändert und kann deshalb von allen Sessions mit
+derselben Suche gemeinsam benutzt werden.
+"""
+import sys
+import threading
+
+import numpy as np
+
+from arztsuche.schedule import build_schedules
+
+TEXT_FELDER = ("id", "name", "tel", "geschlecht", "strasse", "hausnummer", "plz", "ort", "email", "web")
+ZAHL_FELDER = ("distance", "lat", "lon")
+# Wiederkehrende Werte (viele Praxen je Ort/PLZ) nur einmal im Speicher
+_INTERN = {"geschlecht", "plz", "ort"}
+
+
+def _text(value, intern: bool):
+    if value is None:
+        return None
+    value = str(value)
+    return sys.intern(value) if intern else value
+
+
+def _zahl(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class PraxisTabelle:
+    """Spaltenweise Praxisliste; verhält sich wie eine (nur lesbare) Liste von Praxis-Dicts.
+
+    ``tabelle[i]`` baut das Dict einer Zeile bei Bedarf (nur vorhandene Felder), sodass
+    bestehender Code mit ``a.get("name", "")`` unverändert funktioniert.
+    """
+
+    __slots__ = ("_spalten", "_zahlen", "schedules", "_arrow", "_lock", "__weakref__")
+
+    def __init__(self, spalten: dict, zahlen: dict, schedules: list):
+        self._spalten = spalten
+        self._zahlen = zahlen
+        self.schedules = schedules
+        self._arrow = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_daten(cls, arzt_praxis_daten: list[dict]) -> "PraxisTabelle":
+        """Einmal pro Suche: Telefonzeiten vorverarbeiten, danach nur noch die benötigten Felder behalten."""
+        schedules = build_schedules(arzt_praxis_daten)
+        spalten = {
+            feld: tuple(_text(a.get(feld), feld in _INTERN) for a in arzt_praxis_daten)
+            for feld in TEXT_FELDER
+        }
+        zahlen = {
+            feld: np.fromiter((_zahl(a.get(feld)) for a in arzt_praxis_daten), dtype=np.float64,
+                              count=len(arzt_praxis_daten))
+            for feld in ZAHL_FELDER
+        }
+        for z in zahlen.values():
+            z.flags.writeable = False
+        return cls(spalten, zahlen, schedules)
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def __getitem__(self, i: int) -> dict:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        row = {feld: werte[i] for feld, werte in self._spalten.items() if werte[i] is not None}
+        for feld, werte in self._zahlen.items():
+            v = float(werte[i])
+            if not np.isnan(v):
+                row[feld] = int(v) if v.is_integer() and feld == "distance" else v
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def column(self, feld: str):
+        """Eine Spalte ohne Zeilen-Dicts (Tupel bzw. schreibgeschütztes NumPy-Array)."""
+        return self._zahlen[feld] if feld in self._zahlen else self._spalten[feld]
+
+    def to_arrow(self):
+        """Alle Spalten als ``pyarrow.Table`` (einmal gebaut, danach geteilt).
+
+        Ort, PLZ und Geschlecht sind dictionary-kodiert. ``st.dataframe`` nimmt die
+        Tabelle direkt entgegen, ohne Umweg über ``pd.DataFrame``.
+        """
+        if self._arrow is None:
+            with self._lock:
+                if self._arrow is None:
+                    import pyarrow as pa  # kommt mit Streamlit; erst bei Bedarf laden
+
+                    arrays = {}
+                    for feld, werte in self._spalten.items():
+                        arr = pa.array(["" if w is None else w for w in werte], type=pa.string())
+                        arrays[feld] = arr.dictionary_encode() if feld in _INTERN else arr
+                    for feld, werte in self._zahlen.items():
+                        arrays[feld] = pa.array(werte, from_pandas=True)
+                    self._arrow = pa.table(arrays)
+        return self._arrow
+
+    def frame(self, indices, spalten: dict):
+        """Ausgewählte Zeilen/Spalten für ``st.dataframe``; ``spalten``: Feld -> Anzeigename."""
+        import pyarrow as pa
+
+        # fester Typ: eine leere Liste hätte sonst den Arrow-Typ "null", den take() ablehnt
+        table = self.to_arrow().select(list(spalten)).take(pa.array(indices, type=pa.int64()))
+        return table.rename_columns(list(spalten.values()))
@@ -0,0 +1,165 @@
+"""Vorverarbeitete Telefonsprechzeiten je Praxis.
+
+``arzt["tsz"] -> tszDesTyps -> sprechzeiten`` wird beim Einlesen der Antwort einmal
+in ein kompaktes :class:`Schedule` übersetzt; alle Auswertungen (jetzt erreichbar,
+heutige Zeiten, nächste Zeitfenster, Excel) arbeiten danach nur noch darauf.
+"""
+import heapq
+import logging
+import re
+import sys
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+TELEFON_TYP = "Telefonische Erreichbarkeit"
+weekday_idx_map = {"Mo.": 0, "Di.": 1, "Mi.": 2, "Do.": 3, "Fr.": 4, "Sa.": 5, "So.": 6}
+
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_reported = set()  # bereits gemeldete fehlerhafte Zeitangaben (pro Prozess nur einmal loggen)
+
+
+def _minutes(hhmm: str):
+    m = _TIME_RE.fullmatch(hhmm)
+    if m is None:
+        return None
+    h, mi = int(m.group(1)), int(m.group(2))
+    if h > 23 or mi > 59:
+        return None
+    return h * 60 + mi
+
+
+def parse_intervals(raw: str):
+    """Zerlegt z.B. ``"09:00-10:00;14:00-15:00"`` in [(540, 600), (840, 900)].
+
+    Gibt zusätzlich die nicht lesbaren Teilstücke zurück.
+    """
+    intervals, invalid = [], []
+    # mehrere Intervalle per ; oder , getrennt erlauben
+    for interval in re.split(r"[;,]", (raw or "").replace(" ", "")):
+        if not interval:
+            continue
+        parts = interval.split("-")
+        start = _minutes(parts[0]) if len(parts) == 2 else None
+        end = _minutes(parts[1]) if len(parts) == 2 else None
+        if start is None or end is None:
+            invalid.append(interval)
+        else:
+            intervals.append((start, end))
+    return intervals, invalid
+
+
+class Schedule:
+    """Telefonzeiten einer Praxis.
+
+    ``entries``: (Wochentag-Index, Zeitangabe wie geliefert) je Sprechzeit-Eintrag.
+    ``windows``: (Wochentag-Index, Start-Minute, End-Minute) je lesbarem Intervall.
+    """
+
+    __slots__ = ("entries", "windows", "invalid")
+
+    def __init__(self, entries, windows, invalid):
+        self.entries = entries
+        self.windows = windows
+        self.invalid = invalid
+
+    @classmethod
+    def from_arzt(cls, arzt: dict) -> "Schedule":
+        entries, windows, invalid = [], [], []
+        for ts in arzt.get("tsz", []):
+            day = weekday_idx_map.get(ts.get("t", ""))
+            if day is None:
+                continue
+            for ts_typ in ts.get("tszDesTyps", []):
+                if ts_typ.get("typ") != TELEFON_TYP:
+                    continue
+                for sprechzeit in ts_typ.get("sprechzeiten", []):
+                    zeit = sys.intern(sprechzeit.get("zeit", "") or "")  # viele Praxen, wenige verschiedene Zeiten
+                    entries.append((day, zeit))
+                    intervals, bad = parse_intervals(zeit)
+                    windows.extend((day, start, end) for start, end in intervals)
+                    invalid.extend(bad)
+        for raw in invalid:
+            if raw not in _reported:
+                _reported.add(raw)
+                logger.warning("Nicht lesbare Telefonzeit %r (Praxis %s)", raw, arzt.get("id", ""))
+        return cls(tuple(entries), tuple(windows), tuple(invalid))
+
+
+def build_schedules(arzt_liste: list[dict]) -> list[Schedule]:
+    """Einmal pro Suche: Schedule je Praxis, in derselben Reihenfolge wie ``arzt_liste``."""
+    return [Schedule.from_arzt(a) for a in arzt_liste]
+
+
+def zeit_sort_key(zeit: str):
+    """Sortierschlüssel für Zeitangaben: Beginn des ersten Intervalls in Minuten."""
+    intervals, _ = parse_intervals(zeit)
+    return (intervals[0][0] if intervals else 24 * 60, zeit)
+
+
+def _seconds_of_day(now_dt: datetime) -> float:
+    return now_dt.hour * 3600 + now_dt.minute * 60 + now_dt.second + now_dt.microsecond / 1e6
+
+
+def is_reachable_now(schedule: Schedule, now_dt: datetime) -> bool:
+    """Prüft, ob der Eintrag jetzt (Europe/Berlin) telefonisch erreichbar ist."""
+    today_idx = now_dt.weekday()
+    now_s = _seconds_of_day(now_dt)
+    return any(
+        day == today_idx and start * 60 <= now_s <= end * 60
+        for day, start, end in schedule.windows
+    )
+
+
+def todays_phone_windows(schedule: Schedule, now_dt: datetime) -> str:
+    """Gibt alle heutigen Telefonzeiten als kommagetrennte Liste zurück (für Anzeige)."""
+    today_idx = now_dt.weekday()
+    windows = {zeit.strip() for day, zeit in schedule.entries if day == today_idx and zeit.strip()}
+    # Duplikate entfernen, sortiert ausgeben
+    return ", ".join(sorted(windows))
+
+
+def _norm_tel(t: str) -> str:
+    # Nur Ziffern behalten -> stabile Vergleichsbasis für Duplikaterkennung
+    return re.sub(r"\D+", "", t or "")
+
+
+def next_available_windows(arzt_liste: list[dict], schedules: list[Schedule], now_dt: datetime, max_results: int = 5):
+    """Sucht die nächsten Telefon-Zeitfenster (nur zukünftige Starts; bis 7 Tage voraus), ohne Duplikate."""
+    results = []
+    seen = set()  # <-- Duplikate verhindern
+    tz = ZoneInfo("Europe/Berlin")
+    now_local = now_dt  # already in Europe/Berlin
+
+    for a, schedule in zip(arzt_liste, schedules):
+        name = a.get("name", "") or ""
+        tel = a.get("tel", "") or ""
+        tel_norm = _norm_tel(tel)
+        arzt_id = a.get("id", "") or ""
+
+        for day_offset in range(0, 7):  # heute + nächste 6 Tage
+            day_dt = (now_local + timedelta(days=day_offset)).date()
+            weekday = (now_local.weekday() + day_offset) % 7
+            for day, start, end in schedule.windows:
+                if day != weekday:
+                    continue
+                start_dt = datetime.combine(day_dt, time(start // 60, start % 60), tzinfo=tz)
+                end_dt = datetime.combine(day_dt, time(end // 60, end % 60), tzinfo=tz)
+                # NUR echte Zukunft: Start > jetzt (keine laufenden Slots)
+                if start_dt <= now_local:
+                    continue
+                key = (arzt_id, name.strip(), tel_norm, start_dt, end_dt)
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append({
+                    "Start": start_dt,
+                    "Ende": end_dt,
+                    "Name": name,
+                    "Telefon": tel,
+                    "Ort": a.get("ort", "") or "",
+                    "PLZ": a.get("plz", "") or ""
+                })
+    # Nach Startzeit sortieren und begrenzen (nsmallest ist stabil wie sorted()[:n])
+    return heapq.nsmallest(max_results, results, key=lambda x: x["Start"])
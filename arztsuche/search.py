@@ -0,0 +1,169 @@
+"""Suche ohne Streamlit: PLZ -> Koordinaten -> räumlicher Index/Cache/API -> Telefonzeiten.
+
+Bei 116117 wird nur so viel Radius angefragt wie nötig (``RADIUS_STUFEN``). Findet
+sich im gewählten Umkreis zu wenig, wird stufenweise erweitert. Alles Geladene landet
+im räumlichen Index (und, falls aktiviert, in der lokalen Praxis-Datenbank), sodass
+Radiuswechsel und Nachbar-PLZ meist lokal beantwortet werden.
+"""
+import math
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from arztsuche.anrufplan import build_anrufplan
+from arztsuche.api import get_api_client
+from arztsuche.cache import ResponseCache, cache_key, get_response_cache
+from arztsuche.engine import WindowTable
+from arztsuche.metrics import observe_practices, timed
+from arztsuche.pipeline import run_upstream
+from arztsuche.plz_index import get_plz_index
+from arztsuche.praxen import PraxisTabelle
+from arztsuche.spatial import spatial_index
+from arztsuche.store import get_practice_store
+
+RADIUS_STUFEN = (5, 10, 25, 50, 100)  # km
+MIN_TREFFER = 10
+
+
+class PlzNichtGefunden(LookupError):
+    """Die PLZ ist nicht in ``plz_geocoord.csv`` enthalten."""
+
+
+class Suchergebnis:
+    """Ergebnis einer Suche inkl. vorverarbeiteter Telefonzeiten.
+
+    ``arzt_praxis_daten`` ist eine kompakte :class:`PraxisTabelle`; alles außer
+    ``zeitpunkt`` ist nach dem Bau unveränderlich und wird zwischen Sessions geteilt.
+    """
+
+    __slots__ = ("arzt_praxis_daten", "schedules", "window_table", "anrufplan", "zeitpunkt", "radius_gewaehlt", "radius_km")
+
+    def __init__(self, arzt_praxis_daten: list[dict], zeitpunkt: datetime | None = None,
+                 radius_gewaehlt: float | None = None, radius_km: float | None = None):
+        # gewählter und (nach evtl. Erweiterung) tatsächlich verwendeter Radius
+        self.radius_gewaehlt = radius_gewaehlt
+        self.radius_km = radius_km
+        # Telefonzeiten einmal pro Suche vorverarbeiten (statt bei jedem Rerun)
+        with timed("schedule_build", practices=len(arzt_praxis_daten)):
+            self.arzt_praxis_daten = PraxisTabelle.from_daten(arzt_praxis_daten)
+            self.schedules = self.arzt_praxis_daten.schedules
+            self.window_table = WindowTable.from_schedules(self.arzt_praxis_daten, self.schedules)
+            self.anrufplan = build_anrufplan(self.arzt_praxis_daten, self.schedules)
+        self.zeitpunkt = zeitpunkt or datetime.now(ZoneInfo("Europe/Berlin"))
+
+    def mit_zeitpunkt(self, zeitpunkt: datetime | None = None) -> "Suchergebnis":
+        """Dasselbe (geteilte) Ergebnis, ausgewertet zu einem neuen Zeitpunkt."""
+        kopie = object.__new__(Suchergebnis)
+        for slot in self.__slots__:
+            setattr(kopie, slot, getattr(self, slot))
+        kopie.zeitpunkt = zeitpunkt or datetime.now(ZoneInfo("Europe/Berlin"))
+        return kopie
+
+    def __len__(self):
+        return len(self.arzt_praxis_daten)
+
+
+_ergebnisse = None
+_ergebnisse_lock = threading.Lock()
+
+
+def _ergebnis_cache() -> ResponseCache:
+    """Fertige Suchergebnisse im Speicher (gleiche TTL/Größe wie der Antwort-Cache)."""
+    global _ergebnisse
+    if _ergebnisse is None:
+        with _ergebnisse_lock:
+            if _ergebnisse is None:
+                response_cache = get_response_cache()
+                _ergebnisse = ResponseCache(ttl=response_cache.ttl, max_entries=response_cache.max_entries)
+    return _ergebnisse
+
+
+def fetch_cached(lat: float, lon: float, ptv: str, pta: str, pts: str, r: int = 900, limiter=None) -> list[dict]:
+    """Alle Praxen im Umkreis von ``r`` km – aus dem gemeinsamen Cache oder frisch von 116117.
+
+    Gleichzeitige Fehlschläge für denselben Schlüssel lösen nur eine Upstream-Anfrage aus.
+    """
+    return fetch_cached_entry(lat, lon, ptv, pta, pts, r=r, limiter=limiter)[1]
+
+
+def fetch_cached_entry(lat: float, lon: float, ptv: str, pta: str, pts: str, r: int = 900,
+                       limiter=None) -> tuple[float, list[dict]]:
+    """Wie :func:`fetch_cached`, plus Zeitpunkt, zu dem die Antwort von 116117 geladen wurde."""
+    response_cache = get_response_cache()
+    key = cache_key(lat, lon, ptv, pta, pts, r)
+    entry = response_cache.get_entry(key)
+    if entry is not None:
+        return entry
+
+    def fetch():
+        entry = response_cache.get_entry(key)  # evtl. hat eine eben beendete Anfrage den Cache schon gefüllt
+        if entry is None:
+            daten = get_api_client().fetch(lat, lon, ptv, pta, pts, r=r, limiter=limiter)
+            entry = response_cache.put(key, daten), daten
+            observe_practices("upstream", len(daten))
+        return entry
+
+    return run_upstream(key, fetch)
+
+
+def umkreissuche(lat: float, lon: float, radius_km: float, ptv: str, pta: str, pts: str,
+                 min_treffer: int = 0, limiter=None) -> tuple[list[dict], float]:
+    """Praxen im Umkreis, nach Entfernung sortiert, plus tatsächlich verwendeter Radius.
+
+    Bei weniger als ``min_treffer`` Treffern wird der Radius stufenweise erweitert.
+    """
+    grid = spatial_index.grid(ptv, pta, pts)
+    stufen = [r for r in RADIUS_STUFEN if r > radius_km]
+    radius = radius_km
+    while True:
+        with timed("radius_filter", radius_km=radius):
+            treffer = grid.query(lat, lon, radius)
+        store = get_practice_store()
+        if treffer is None and store is not None:
+            with timed("store_query", radius_km=radius):
+                treffer = store.query(lat, lon, radius, ptv, pta, pts)
+        if treffer is None:
+            # Nicht lokal abgedeckt: genau diesen Radius (aufgerundet auf ganze km) nachladen
+            r = math.ceil(radius)
+            # Ursprünglicher Ladezeitpunkt: eine Antwort aus dem Cache darf nicht als frisch gelten
+            geladen, daten = fetch_cached_entry(lat, lon, ptv, pta, pts, r=r, limiter=limiter)
+            if store is not None:
+                store.upsert(lat, lon, r, ptv, pta, pts, daten, geladen=geladen)
+            if grid.add(lat, lon, r, daten, geladen=geladen):
+                treffer = grid.query(lat, lon, radius)
+            if treffer is None:
+                # Ohne Koordinaten kein Index -> Entfernung von 116117 verwenden
+                treffer = [a for a in daten if a.get("distance", 0) <= radius * 1000]
+        if len(treffer) >= min_treffer or not stufen:
+            return treffer, radius
+        radius = stufen.pop(0)
+
+
+def suche(postcode: str, radius_km: float, ptv: str, pta: str, pts: str,
+          min_treffer: int = MIN_TREFFER, on_stage=None) -> Suchergebnis:
+    """Komplette Suche für eine PLZ; wirft :class:`PlzNichtGefunden` bzw. ``ApiError``."""
+    def stage(text, anteil):
+        if on_stage is not None:
+            on_stage(text, anteil)
+
+    stage("Koordinaten werden ermittelt …", 0.0)
+    with timed("plz_lookup"):
+        coords = get_plz_index().lookup(postcode)
+    if coords is None:
+        raise PlzNichtGefunden(f"Keine Koordinaten für die PLZ {postcode} gefunden.")
+    lat, lon = coords
+
+    # Identische Suche schon ausgewertet -> gemeinsame, nur lesbare Daten wiederverwenden
+    key = cache_key(lat, lon, ptv, pta, pts, radius_km) + (min_treffer,)
+    ergebnisse = _ergebnis_cache()
+    ergebnis = ergebnisse.get(key)
+    if ergebnis is not None:
+        return ergebnis.mit_zeitpunkt()
+
+    stage("Praxen im Umkreis werden gesucht …", 0.1)
+    arzt_praxis_daten, radius_verwendet = umkreissuche(lat, lon, radius_km, ptv, pta, pts, min_treffer=min_treffer)
+    observe_practices("gefiltert", len(arzt_praxis_daten))
+    stage("Telefonzeiten werden ausgewertet …", 0.8)
+    ergebnis = Suchergebnis(arzt_praxis_daten, radius_gewaehlt=radius_km, radius_km=radius_verwendet)
+    ergebnisse.put(key, ergebnis)
+    return ergebnis
@@ -0,0 +1,153 @@
+"""Räumlicher Index der bereits geladenen Praxen.
+
+Pro Filterkombination (ptv, pta, pts) werden Praxen in einem Gitter (Zellen von
+``CELL_DEG`` Grad) nach Koordinaten abgelegt. Zusätzlich merkt sich das Gitter,
+welche Kreise (Mittelpunkt + Radius) vollständig von 116117 geladen wurden. Liegt
+eine neue Suche – anderer Radius oder benachbarte PLZ – komplett in einem solchen
+Kreis, wird sie lokal beantwortet, ohne neue Anfrage.
+
+Kreise und Praxen gelten so lange wie Einträge im Antwort-Cache (``ttl``); danach
+wird der Kreis nicht mehr lokal beantwortet und seine Praxen werden verworfen.
+"""
+import math
+import threading
+import time
+
+CELL_DEG = 0.1  # ~11 km in Nord-Süd-Richtung
+EARTH_RADIUS_M = 6_371_000
+MAX_PRAXEN_JE_GITTER = 200_000
+# Liefert 116117 so viele Treffer, ist die Antwort evtl. abgeschnitten -> Abdeckung nur bis zur weitesten Praxis
+UPSTREAM_MAX_TREFFER = 100
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _cell(lat: float, lon: float) -> tuple:
+    return (math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG))
+
+
+def abdeckung_m(radius_km: float, arzt_praxis_daten: list[dict]) -> float:
+    """Radius (m), bis zu dem eine Antwort für Radius ``radius_km`` sicher vollständig ist."""
+    if len(arzt_praxis_daten) >= UPSTREAM_MAX_TREFFER:
+        return min(radius_km * 1000, max((a.get("distance", 0) for a in arzt_praxis_daten), default=0))
+    return radius_km * 1000
+
+
+def _praxis_key(a: dict):
+    return a.get("id") or (a.get("name"), a.get("tel"))
+
+
+class PracticeGrid:
+    """Gitter-Index für eine Filterkombination."""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl  # Sekunden; None = kein Ablauf
+        self._cells = {}  # (zeile, spalte) -> {praxis_key: (geladen, praxis)}
+        self._coverage = []  # [(lat, lon, radius_m, geladen)]
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def add(self, lat: float, lon: float, radius_km: float, arzt_praxis_daten: list[dict],
+            geladen: float | None = None) -> bool:
+        """Übernimmt eine Antwort für den Kreis (lat, lon, radius_km), geladen zum Zeitpunkt ``geladen``.
+
+        Gibt False zurück, wenn Praxen ohne Koordinaten dabei sind – dann kann der Kreis
+        nicht lokal beantwortet werden.
+        """
+        if any(a.get("lat") is None or a.get("lon") is None for a in arzt_praxis_daten):
+            return False
+        geladen = time.time() if geladen is None else geladen
+        radius_m = abdeckung_m(radius_km, arzt_praxis_daten)
+        with self._lock:
+            self._verwerfen_abgelaufene()
+            if self._size + len(arzt_praxis_daten) > MAX_PRAXEN_JE_GITTER:
+                self._cells.clear()
+                self._coverage.clear()
+                self._size = 0
+            for a in arzt_praxis_daten:
+                bucket = self._cells.setdefault(_cell(float(a["lat"]), float(a["lon"])), {})
+                key = _praxis_key(a)
+                bisher = bucket.get(key)
+                if bisher is None:
+                    self._size += 1
+                elif bisher[0] > geladen:
+                    continue  # neuere Antwort schon übernommen
+                bucket[key] = (geladen, a)
+            self._coverage.append((lat, lon, radius_m, geladen))
+        return True
+
+    def _verwerfen_abgelaufene(self) -> None:
+        """Abgelaufene Kreise entfernen und Praxen, die seitdem in keiner Antwort mehr vorkamen (Lock gehalten)."""
+        if self.ttl is None:
+            return
+        grenze = time.time() - self.ttl
+        if not any(c[3] < grenze for c in self._coverage):
+            return
+        self._coverage = [c for c in self._coverage if c[3] >= grenze]
+        for zelle in list(self._cells):
+            bucket = self._cells[zelle]
+            for key in [k for k, (geladen, _) in bucket.items() if geladen < grenze]:
+                del bucket[key]
+                self._size -= 1
+            if not bucket:
+                del self._cells[zelle]
+
+    def covers(self, lat: float, lon: float, radius_km: float) -> bool:
+        radius_m = radius_km * 1000
+        with self._lock:
+            self._verwerfen_abgelaufene()
+            return any(
+                haversine_m(lat, lon, c_lat, c_lon) + radius_m <= c_radius
+                for c_lat, c_lon, c_radius, _ in self._coverage
+            )
+
+    def query(self, lat: float, lon: float, radius_km: float):
+        """Praxen im Umkreis, nach Entfernung sortiert; None, falls der Kreis nicht abgedeckt ist.
+
+        ``distance`` wird für den angefragten Mittelpunkt neu berechnet (flache Kopien).
+        """
+        if not self.covers(lat, lon, radius_km):
+            return None
+        radius_m = radius_km * 1000
+        d_lat = radius_km / 111.32
+        d_lon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+        (r0, c0), (r1, c1) = _cell(lat - d_lat, lon - d_lon), _cell(lat + d_lat, lon + d_lon)
+        treffer = []
+        with self._lock:
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    for _, a in self._cells.get((row, col), {}).values():
+                        d = haversine_m(lat, lon, float(a["lat"]), float(a["lon"]))
+                        if d <= radius_m:
+                            treffer.append((d, a))
+        treffer.sort(key=lambda x: x[0])
+        return [dict(a, distance=round(d)) for d, a in treffer]
+
+
+class SpatialIndex:
+    """Prozessweit: ein :class:`PracticeGrid` je Filterkombination (TTL wie der Antwort-Cache)."""
+
+    def __init__(self):
+        self._grids = {}
+        self._lock = threading.Lock()
+
+    def grid(self, ptv: str, pta: str, pts: str) -> PracticeGrid:
+        with self._lock:
+            grid = self._grids.get((ptv, pta, pts))
+            if grid is None:
+                from arztsuche.cache import get_response_cache
+
+                grid = self._grids[(ptv, pta, pts)] = PracticeGrid(ttl=get_response_cache().ttl)
+            return grid
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grids.clear()
+
+
+spatial_index = SpatialIndex()
@@ -0,0 +1,269 @@
+"""Optionale lokale Praxis-Datenbank (SQLite) mit inkrementeller Aktualisierung.
+
+Jede von 116117 geladene Antwort wird per ``id`` in die Datenbank übernommen
+(Upsert; Änderungen werden über einen Hash der Praxisdaten erkannt). Zusätzlich
+wird gespeichert, welche Regionen (Mittelpunkt, Radius, Filter) wann geladen
+wurden. Suchen innerhalb einer frischen Region werden per Index-Abfrage
+beantwortet; ein Hintergrund-Thread lädt veraltete Regionen nach.
+
+Aktiv nur, wenn ``ARZTSUCHE_DB`` gesetzt ist:
+    ARZTSUCHE_DB                   Pfad zur SQLite-Datei
+    ARZTSUCHE_DB_MAX_AGE           Regionen gelten so viele Sekunden als frisch (Standard: 86400)
+    ARZTSUCHE_DB_REFRESH_INTERVAL  Prüfintervall des Hintergrund-Refreshers in Sekunden (Standard: 3600, 0 = aus)
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from arztsuche.schedule import Schedule
+from arztsuche.spatial import abdeckung_m, haversine_m
+
+logger = logging.getLogger(__name__)
+
+# Regionsmittelpunkte werden auf 5 Nachkommastellen gerundet gespeichert (< 1 m Versatz);
+# um so viel darf ein Suchkreis über die Abdeckung hinausragen
+MITTELPUNKT_TOLERANZ_M = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS praxis (
+    id TEXT PRIMARY KEY,
+    name TEXT, tel TEXT, plz TEXT, ort TEXT,
+    lat REAL, lon REAL,
+    daten TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    aktualisiert REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS praxis_plz ON praxis (plz);
+CREATE INDEX IF NOT EXISTS praxis_lat_lon ON praxis (lat, lon);
+
+CREATE TABLE IF NOT EXISTS praxis_filter (
+    praxis_id TEXT NOT NULL, ptv TEXT NOT NULL, pta TEXT NOT NULL, pts TEXT NOT NULL,
+    PRIMARY KEY (ptv, pta, pts, praxis_id)
+);
+
+CREATE TABLE IF NOT EXISTS telefonfenster (
+    praxis_id TEXT NOT NULL, wochentag INTEGER NOT NULL, start INTEGER NOT NULL, ende INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS telefonfenster_zeit ON telefonfenster (wochentag, start, ende);
+CREATE INDEX IF NOT EXISTS telefonfenster_praxis ON telefonfenster (praxis_id);
+
+CREATE TABLE IF NOT EXISTS region (
+    lat REAL NOT NULL, lon REAL NOT NULL, r INTEGER NOT NULL,
+    ptv TEXT NOT NULL, pta TEXT NOT NULL, pts TEXT NOT NULL,
+    abdeckung_m REAL NOT NULL,
+    geladen REAL NOT NULL,
+    PRIMARY KEY (ptv, pta, pts, lat, lon, r)
+);
+"""
+
+
+def _hash(a: dict) -> str:
+    return hashlib.sha1(json.dumps(a, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class PracticeStore:
+    """Thread-sichere SQLite-Ablage der Praxen, Filterzuordnungen, Telefonfenster und Regionen."""
+
+    def __init__(self, path: str, max_age: float = 86400):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def upsert(self, lat: float, lon: float, r: int, ptv: str, pta: str, pts: str, arzt_praxis_daten: list[dict],
+               geladen: float | None = None) -> dict:
+        """Übernimmt eine Antwort; gibt Zähler {"neu", "geaendert", "unveraendert", "entfernt"} zurück.
+
+        ``geladen``: Zeitpunkt, zu dem 116117 die Antwort geliefert hat (Standard: jetzt) – bei
+        Antworten aus dem Cache der ursprüngliche, damit die Region nicht frischer erscheint.
+        Liegt für die Region schon eine mindestens so neue Antwort vor, passiert nichts.
+
+        Praxen mit diesem Filter, die im abgedeckten Kreis liegen, aber in der Antwort fehlen,
+        verlieren ihre Filterzuordnung ("entfernt"); Praxen ganz ohne Zuordnung werden gelöscht.
+        """
+        now = time.time() if geladen is None else geladen
+        counts = {"neu": 0, "geaendert": 0, "unveraendert": 0, "entfernt": 0}
+        with self._lock, self._db:
+            bisher = self._db.execute(
+                "SELECT geladen FROM region WHERE ptv = ? AND pta = ? AND pts = ? AND lat = ? AND lon = ? AND r = ?",
+                (ptv, pta, pts, round(lat, 5), round(lon, 5), r),
+            ).fetchone()
+            if bisher is not None and bisher[0] >= now:
+                return counts
+            for a in arzt_praxis_daten:
+                praxis_id = a.get("id")
+                if not praxis_id:
+                    continue
+                # distance bezieht sich auf den Suchmittelpunkt und gehört nicht zur Praxis
+                stamm = {k: v for k, v in a.items() if k != "distance"}
+                digest = _hash(stamm)
+                row = self._db.execute("SELECT hash FROM praxis WHERE id = ?", (praxis_id,)).fetchone()
+                if row is not None and row[0] == digest:
+                    counts["unveraendert"] += 1
+                    self._db.execute("UPDATE praxis SET aktualisiert = ? WHERE id = ?", (now, praxis_id))
+                else:
+                    counts["neu" if row is None else "geaendert"] += 1
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO praxis (id, name, tel, plz, ort, lat, lon, daten, hash, aktualisiert)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (praxis_id, a.get("name"), a.get("tel"), a.get("plz"), a.get("ort"),
+                         a.get("lat"), a.get("lon"), json.dumps(stamm, ensure_ascii=False), digest, now),
+                    )
+                    self._db.execute("DELETE FROM telefonfenster WHERE praxis_id = ?", (praxis_id,))
+                    self._db.executemany(
+                        "INSERT INTO telefonfenster (praxis_id, wochentag, start, ende) VALUES (?, ?, ?, ?)",
+                        [(praxis_id, day, start, end) for day, start, end in Schedule.from_arzt(a).windows],
+                    )
+                self._db.execute(
+                    "INSERT OR IGNORE INTO praxis_filter (praxis_id, ptv, pta, pts) VALUES (?, ?, ?, ?)",
+                    (praxis_id, ptv, pta, pts),
+                )
+            # Ohne id/Koordinaten lässt sich die Region nicht aus der Datenbank beantworten
+            vollstaendig = all(a.get("id") and a.get("lat") is not None and a.get("lon") is not None
+                               for a in arzt_praxis_daten)
+            abdeckung = abdeckung_m(r, arzt_praxis_daten) if vollstaendig else 0.0
+            if abdeckung > 0:
+                counts["entfernt"] = self._entferne_fehlende(
+                    lat, lon, abdeckung, ptv, pta, pts, {a["id"] for a in arzt_praxis_daten})
+            self._db.execute(
+                "INSERT OR REPLACE INTO region (lat, lon, r, ptv, pta, pts, abdeckung_m, geladen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (round(lat, 5), round(lon, 5), r, ptv, pta, pts, abdeckung, now),
+            )
+        return counts
+
+    def _entferne_fehlende(self, lat: float, lon: float, abdeckung: float, ptv: str, pta: str, pts: str,
+                           ids: set) -> int:
+        """Filterzuordnung für Praxen im Kreis entfernen, die nicht mehr geliefert werden (Lock + Transaktion gehalten)."""
+        d_lat = abdeckung / 1000 / 111.32
+        d_lon = abdeckung / 1000 / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+        rows = self._db.execute(
+            "SELECT p.id, p.lat, p.lon FROM praxis p"
+            " JOIN praxis_filter f ON f.praxis_id = p.id AND f.ptv = ? AND f.pta = ? AND f.pts = ?"
+            " WHERE p.lat BETWEEN ? AND ? AND p.lon BETWEEN ? AND ?",
+            (ptv, pta, pts, lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon),
+        ).fetchall()
+        weg = [(praxis_id,) for praxis_id, p_lat, p_lon in rows
+               if praxis_id not in ids and haversine_m(lat, lon, p_lat, p_lon) <= abdeckung]
+        if weg:
+            self._db.executemany(
+                "DELETE FROM praxis_filter WHERE praxis_id = ? AND ptv = ? AND pta = ? AND pts = ?",
+                [(praxis_id, ptv, pta, pts) for (praxis_id,) in weg],
+            )
+            for tabelle, spalte in (("telefonfenster", "praxis_id"), ("praxis", "id")):
+                self._db.executemany(
+                    f"DELETE FROM {tabelle} WHERE {spalte} = ?"
+                    " AND NOT EXISTS (SELECT 1 FROM praxis_filter WHERE praxis_id = ?)",
+                    [(praxis_id, praxis_id) for (praxis_id,) in weg],
+                )
+        return len(weg)
+
+    def query(self, lat: float, lon: float, radius_km: float, ptv: str, pta: str, pts: str):
+        """Praxen im Umkreis aus der Datenbank, nach Entfernung sortiert.
+
+        None, wenn keine frische geladene Region den Kreis vollständig abdeckt.
+        """
+        radius_m = radius_km * 1000
+        with self._lock:
+            regionen = self._db.execute(
+                "SELECT lat, lon, abdeckung_m FROM region WHERE ptv = ? AND pta = ? AND pts = ? AND geladen >= ?",
+                (ptv, pta, pts, time.time() - self.max_age),
+            ).fetchall()
+            if not any(haversine_m(lat, lon, r_lat, r_lon) + radius_m <= r_m + MITTELPUNKT_TOLERANZ_M
+                       for r_lat, r_lon, r_m in regionen):
+                return None
+            d_lat = radius_km / 111.32
+            d_lon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+            rows = self._db.execute(
+                "SELECT p.lat, p.lon, p.daten FROM praxis p"
+                " JOIN praxis_filter f ON f.praxis_id = p.id AND f.ptv = ? AND f.pta = ? AND f.pts = ?"
+                " WHERE p.lat BETWEEN ? AND ? AND p.lon BETWEEN ? AND ?",
+                (ptv, pta, pts, lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon),
+            ).fetchall()
+        treffer = []
+        for p_lat, p_lon, daten in rows:
+            d = haversine_m(lat, lon, p_lat, p_lon)
+            if d <= radius_m:
+                treffer.append((d, daten))
+        treffer.sort(key=lambda x: x[0])
+        return [dict(json.loads(daten), distance=round(d)) for d, daten in treffer]
+
+    def reachable_ids(self, wochentag: int, minute: int, ptv: str, pta: str, pts: str) -> list[str]:
+        """IDs aller Praxen (mit diesem Filter), die zum Zeitpunkt telefonisch erreichbar sind."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT t.praxis_id FROM telefonfenster t"
+                " JOIN praxis_filter f ON f.praxis_id = t.praxis_id AND f.ptv = ? AND f.pta = ? AND f.pts = ?"
+                " WHERE t.wochentag = ? AND t.start <= ? AND t.ende >= ?",
+                (ptv, pta, pts, wochentag, minute, minute),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def stale_regions(self) -> list[tuple]:
+        """(lat, lon, r, ptv, pta, pts) aller Regionen, die älter als ``max_age`` sind."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT lat, lon, r, ptv, pta, pts FROM region WHERE geladen < ? ORDER BY geladen",
+                (time.time() - self.max_age,),
+            ).fetchall()
+
+    def refresh_stale(self, limit: int = 20) -> int:
+        """Lädt bis zu ``limit`` veraltete Regionen neu (direkt von 116117, ohne Antwort-Cache).
+
+        Läuft über die Pipeline: globale Begrenzung und Coalescing mit gleichzeitigen Suchen.
+        """
+        from arztsuche.api import get_api_client
+        from arztsuche.cache import cache_key
+        from arztsuche.pipeline import run_upstream
+
+        client = get_api_client()
+        erledigt = 0
+        for lat, lon, r, ptv, pta, pts in self.stale_regions()[:limit]:
+            try:
+                daten = run_upstream(cache_key(lat, lon, ptv, pta, pts, r),
+                                     lambda: client.fetch(lat, lon, ptv, pta, pts, r=r))
+            except Exception as e:
+                logger.warning("Aktualisierung der Region (%s, %s, %s km) fehlgeschlagen: %s", lat, lon, r, e)
+                continue
+            counts = self.upsert(lat, lon, r, ptv, pta, pts, daten)
+            logger.info("Region (%s, %s, %s km) aktualisiert: %s", lat, lon, r, counts)
+            erledigt += 1
+        return erledigt
+
+
+def _refresh_loop(store: PracticeStore, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            store.refresh_stale()
+        except Exception:
+            logger.exception("Hintergrund-Aktualisierung der Praxis-Datenbank fehlgeschlagen")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_practice_store():
+    """Prozessweite Datenbank oder None, wenn ``ARZTSUCHE_DB`` nicht gesetzt ist."""
+    global _store
+    path = os.environ.get("ARZTSUCHE_DB")
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PracticeStore(path, max_age=float(os.environ.get("ARZTSUCHE_DB_MAX_AGE", 86400)))
+                interval = float(os.environ.get("ARZTSUCHE_DB_REFRESH_INTERVAL", 3600))
+                if interval > 0:
+                    threading.Thread(target=_refresh_loop, args=(_store, interval),
+                                     name="praxis-db-refresh", daemon=True).start()
+    return _store
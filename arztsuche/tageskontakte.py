@@ -0,0 +1,153 @@
+"""Einlesen und Fortschreiben der Anrufliste für die Seite "Tages-Telefonkontakte".
+
+Die hochgeladene Excel-Datei wird einmal im read-only-Modus von openpyxl gestreamt
+(kein pandas, kein vollständiges DOM). Die aktualisierte Datei entsteht erst beim
+Download, ebenfalls zeilenweise im write-only-Modus.
+
+Eine Zeile des Blatts "Telefonsprechzeiten" kann mehrere Praxen enthalten
+("Name (Tel: …), Name (Tel: …)"); der Status wird je Praxis im
+:class:`~arztsuche.kontakte.KontaktStore` geführt und erst beim Download in die
+Zeilen zurückgeschrieben.
+"""
+import hashlib
+import io
+import re
+
+from arztsuche.schedule import _norm_tel
+
+STATUS_SPALTE = "Status"
+NOTIZ_SPALTE = "Notiz"
+
+_PRAXIS_RE = re.compile(r"\s*(.+?) \(Tel: ([^)]*)\)(?:,|$)")
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class Anrufliste:
+    """Kopfzeile + Zeilen des Telefonsprechzeiten-Blatts (zweites Blatt, sonst erstes)."""
+
+    __slots__ = ("sheet_name", "header", "rows", "praxis_ids")
+
+    def __init__(self, sheet_name: str, header: tuple, rows: list[tuple], praxis_ids: dict | None = None):
+        self.sheet_name = sheet_name
+        self.header = header
+        self.rows = rows
+        self.praxis_ids = praxis_ids or {}  # (Name, Telefon nur Ziffern) -> id aus dem Blatt "Praxisdaten"
+
+    def column(self, name: str):
+        return self.header.index(name) if name in self.header else None
+
+    def rows_for_day(self, tag: str) -> list[int]:
+        """Zeilennummern (Index in ``rows``), deren Wochentag ``tag`` ist (z.B. "Mo")."""
+        col = self.column("Wochentag")
+        if col is None:
+            return []
+        tag = tag.lower()
+        return [i for i, row in enumerate(self.rows)
+                if col < len(row) and str(row[col] or "").strip().lower() == tag]
+
+    def _cell(self, row: tuple, name: str) -> str:
+        col = self.column(name)
+        value = row[col] if col is not None and col < len(row) else None
+        return "" if value is None else str(value)
+
+    def praxen(self, i: int) -> list[tuple]:
+        """(praxis_id, Name, Telefon) aller Praxen in Zeile ``i``."""
+        row = self.rows[i]
+        text = self._cell(row, "Arzt / Ärztin")
+        treffer = [(m.group(1).strip(), m.group(2).strip()) for m in _PRAXIS_RE.finditer(text)]
+        if not treffer and text.strip():
+            treffer = [(text.strip(), self._cell(row, "Telefon").strip())]
+        return [(self.praxis_id(name, tel), name, tel) for name, tel in treffer]
+
+    def praxis_id(self, name: str, tel: str) -> str:
+        """id aus "Praxisdaten", sonst ein stabiler Ersatzschlüssel aus Telefon bzw. Name."""
+        praxis_id = self.praxis_ids.get((name, _norm_tel(tel)))
+        if praxis_id:
+            return praxis_id
+        return f"tel:{_norm_tel(tel)}" if _norm_tel(tel) else f"name:{name}"
+
+
+def zeilen_stand(anrufliste: Anrufliste, zeilen: list[int], stand: dict) -> dict:
+    """Status/Notiz je Zeile aus dem Stand je Praxis (``stand``: praxis_id -> (Status, Notiz)).
+
+    Bei mehreren Praxen in einer Zeile wird "Name: Status" aneinandergereiht.
+    """
+    updates = {}
+    for i in zeilen:
+        praxen = [(name, stand[pid]) for pid, name, _ in anrufliste.praxen(i) if pid in stand]
+        praxen = [(name, status, notiz) for name, (status, notiz) in praxen if status or notiz]
+        if not praxen:
+            continue
+        if len(anrufliste.praxen(i)) == 1:
+            updates[i] = praxen[0][1:]
+        else:
+            updates[i] = ("; ".join(f"{name}: {status}" for name, status, _ in praxen if status),
+                          "; ".join(f"{name}: {notiz}" for name, _, notiz in praxen if notiz))
+    return updates
+
+
+def read_anrufliste(data: bytes) -> Anrufliste:
+    import openpyxl  # erst beim tatsächlichen Upload laden
+
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet_name = wb.sheetnames[1] if len(wb.sheetnames) > 1 else wb.sheetnames[0]
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header = tuple("" if v is None else str(v) for v in next(rows, ()))
+        return Anrufliste(sheet_name, header, [tuple(r) for r in rows], _praxis_ids(wb))
+    finally:
+        wb.close()
+
+
+def _praxis_ids(wb) -> dict:
+    if "Praxisdaten" not in wb.sheetnames:
+        return {}
+    rows = wb["Praxisdaten"].iter_rows(values_only=True)
+    header = [str(v) for v in next(rows, ())]
+    if not {"id", "name", "tel"} <= set(header):
+        return {}
+    i_id, i_name, i_tel = header.index("id"), header.index("name"), header.index("tel")
+    return {(str(r[i_name] or "").strip(), _norm_tel(str(r[i_tel] or ""))): str(r[i_id])
+            for r in rows if len(r) > max(i_id, i_name, i_tel) and r[i_id]}
+
+
+def updated_workbook(data: bytes, anrufliste: Anrufliste, updates: dict) -> bytes:
+    """Ursprüngliche Datei mit Status/Notiz je Zeile (``updates``: Zeilenindex -> (Status, Notiz)).
+
+    Alle Blätter bleiben erhalten; fehlende Spalten "Status"/"Notiz" werden angehängt.
+    """
+    import openpyxl
+
+    source = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    target = openpyxl.Workbook(write_only=True)
+    try:
+        header = list(anrufliste.header)
+        status_col = anrufliste.column(STATUS_SPALTE)
+        if status_col is None:
+            status_col = len(header)
+            header.append(STATUS_SPALTE)
+        notiz_col = header.index(NOTIZ_SPALTE) if NOTIZ_SPALTE in header else None
+        if notiz_col is None:
+            notiz_col = len(header)
+            header.append(NOTIZ_SPALTE)
+
+        for name in source.sheetnames:
+            ws = target.create_sheet(name)
+            if name != anrufliste.sheet_name:
+                for row in source[name].iter_rows(values_only=True):
+                    ws.append(row)
+                continue
+            ws.append(header)
+            for i, row in enumerate(anrufliste.rows):
+                row = list(row) + [None] * (len(header) - len(row))
+                if i in updates:
+                    row[status_col], row[notiz_col] = updates[i]
+                ws.append(row)
+        buffer = io.BytesIO()
+        target.save(buffer)
+        return buffer.getvalue()
+    finally:
+        source.close()
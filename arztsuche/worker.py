@@ -0,0 +1,336 @@
+"""Headless-Worker: gespeicherte Suchen nach Zeitplan ausführen und Exporte ablegen.
+
+Gespeicherte Suchen und Jobs liegen in einer SQLite-Datei. Ein Scheduler legt für
+jede aktive Suche einmal täglich zur eingestellten Uhrzeit einen Job an; der
+Worker holt wartende Jobs ab und führt sie in einem begrenzten Prozess-Pool aus.
+Je Job werden Dauer, Anzahl Praxen, erzeugte Dateien bzw. der Fehler festgehalten.
+
+Die Prozesse teilen sich den Antwort-Cache über dessen SQLite-Stufe
+(``ARZTSUCHE_CACHE_DB``, Standard: ``cache.sqlite`` neben der Job-Datenbank); noch
+frische Antworten werden also nicht erneut bei 116117 abgefragt.
+
+Aufruf::
+
+    python -m arztsuche.worker add berlin-mitte --plz 10115 --verfahren V --uhrzeit 06:30 --format xlsx ics
+    python -m arztsuche.worker list
+    python -m arztsuche.worker enqueue berlin-mitte          # sofort einplanen
+    python -m arztsuche.worker run --workers 2 --out exporte  # läuft dauerhaft (--once: ein Durchgang)
+    python -m arztsuche.worker jobs
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from arztsuche.api import altersgruppe_options, setting_options, verfahren_options
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = "arztsuche_jobs.sqlite"
+DEFAULT_OUT = "exporte"
+
+WARTEND = "wartend"
+LAEUFT = "laeuft"
+FERTIG = "fertig"
+FEHLER = "fehler"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suche (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    plz TEXT NOT NULL,
+    radius REAL NOT NULL,
+    ptv TEXT NOT NULL, pta TEXT NOT NULL, pts TEXT NOT NULL,
+    formate TEXT NOT NULL,
+    uhrzeit TEXT NOT NULL,
+    aktiv INTEGER NOT NULL DEFAULT 1,
+    zuletzt_geplant TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suche_id INTEGER NOT NULL REFERENCES suche (id),
+    angelegt REAL NOT NULL,
+    status TEXT NOT NULL,
+    gestartet REAL,
+    beendet REAL,
+    dauer_s REAL,
+    praxen INTEGER,
+    messwerte TEXT,
+    dateien TEXT,
+    fehler TEXT
+);
+CREATE INDEX IF NOT EXISTS job_status ON job (status, angelegt);
+CREATE INDEX IF NOT EXISTS job_suche ON job (suche_id, angelegt);
+"""
+
+
+def _jetzt() -> datetime:
+    return datetime.now(ZoneInfo("Europe/Berlin"))
+
+
+class JobQueue:
+    """Gespeicherte Suchen + Job-Warteschlange in SQLite (nur vom Worker-Hauptprozess benutzt)."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def speichere_suche(self, name: str, plz: list[str], radius: float, ptv: str, pta: str, pts: str,
+                        formate: list[str], uhrzeit: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO suche (name, plz, radius, ptv, pta, pts, formate, uhrzeit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET plz = excluded.plz, radius = excluded.radius,"
+                " ptv = excluded.ptv, pta = excluded.pta, pts = excluded.pts,"
+                " formate = excluded.formate, uhrzeit = excluded.uhrzeit, aktiv = 1",
+                (name, " ".join(plz), radius, ptv, pta, pts, " ".join(formate), uhrzeit),
+            )
+
+    def setze_aktiv(self, name: str, aktiv: bool) -> bool:
+        with self._lock, self._db:
+            return self._db.execute("UPDATE suche SET aktiv = ? WHERE name = ?", (int(aktiv), name)).rowcount > 0
+
+    def suchen(self) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT name, plz, radius, ptv, pta, pts, formate, uhrzeit, aktiv, zuletzt_geplant FROM suche ORDER BY name"
+            ).fetchall()
+
+    def einplanen(self, name: str) -> int | None:
+        """Job für die Suche ``name`` sofort anlegen; gibt die Job-id zurück (None: unbekannt)."""
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM suche WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            return self._db.execute(
+                "INSERT INTO job (suche_id, angelegt, status) VALUES (?, ?, ?)", (row[0], time.time(), WARTEND)
+            ).lastrowid
+
+    def faellige_einplanen(self, jetzt: datetime | None = None) -> int:
+        """Legt für jede aktive Suche, deren Uhrzeit heute erreicht ist, einmal pro Tag einen Job an."""
+        jetzt = jetzt or _jetzt()
+        heute, uhrzeit = jetzt.date().isoformat(), jetzt.strftime("%H:%M")
+        with self._lock, self._db:
+            faellig = self._db.execute(
+                "SELECT id FROM suche WHERE aktiv = 1 AND uhrzeit <= ?"
+                " AND (zuletzt_geplant IS NULL OR zuletzt_geplant < ?)",
+                (uhrzeit, heute),
+            ).fetchall()
+            for (suche_id,) in faellig:
+                self._db.execute(
+                    "INSERT INTO job (suche_id, angelegt, status) VALUES (?, ?, ?)", (suche_id, time.time(), WARTEND)
+                )
+                self._db.execute("UPDATE suche SET zuletzt_geplant = ? WHERE id = ?", (heute, suche_id))
+        return len(faellig)
+
+    def abholen(self, limit: int) -> list[tuple]:
+        """Bis zu ``limit`` wartende Jobs als "läuft" markieren; (Job-id, Suchparameter) je Job."""
+        if limit <= 0:
+            return []
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT j.id, s.name, s.plz, s.radius, s.ptv, s.pta, s.pts, s.formate FROM job j"
+                " JOIN suche s ON s.id = j.suche_id WHERE j.status = ? ORDER BY j.angelegt LIMIT ?",
+                (WARTEND, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE job SET status = ?, gestartet = ? WHERE id = ?",
+                [(LAEUFT, time.time(), row[0]) for row in rows],
+            )
+        return [(row[0], {"name": row[1], "plz": row[2].split(), "radius": row[3], "ptv": row[4],
+                          "pta": row[5], "pts": row[6], "formate": row[7].split()}) for row in rows]
+
+    def hat_wartende(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM job WHERE status = ? LIMIT 1", (WARTEND,)).fetchone() is not None
+
+    def abschliessen(self, job_id: int, ergebnis: dict | None = None, fehler: str | None = None) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            if fehler is not None:
+                self._db.execute(
+                    "UPDATE job SET status = ?, beendet = ?, dauer_s = ? - gestartet, fehler = ? WHERE id = ?",
+                    (FEHLER, now, now, fehler, job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE job SET status = ?, beendet = ?, dauer_s = ? - gestartet, praxen = ?,"
+                    " messwerte = ?, dateien = ? WHERE id = ?",
+                    (FERTIG, now, now, ergebnis["praxen"], json.dumps(ergebnis["messwerte"]),
+                     json.dumps(ergebnis["dateien"], ensure_ascii=False), job_id),
+                )
+
+    def abgebrochene_zuruecksetzen(self) -> int:
+        """Jobs, die beim letzten Worker-Ende noch liefen, wieder einreihen."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE job SET status = ?, gestartet = NULL WHERE status = ?", (WARTEND, LAEUFT)
+            ).rowcount
+
+    def jobs(self, limit: int = 20) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT j.id, s.name, j.status, j.angelegt, j.dauer_s, j.praxen, j.dateien, j.fehler"
+                " FROM job j JOIN suche s ON s.id = j.suche_id ORDER BY j.id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+
+def run_job(params: dict, out_dir: str) -> dict:
+    """Führt eine gespeicherte Suche aus und schreibt die Exporte (läuft im Pool-Prozess)."""
+    from arztsuche.batch import run_batch
+    from arztsuche.export import EXPORTER, export_bytes
+    from arztsuche.schedule import build_schedules
+    from arztsuche.search import suche
+
+    messwerte = {}
+    start = time.perf_counter()
+    if len(params["plz"]) == 1:
+        # min_treffer=0: gespeicherter Radius gilt strikt, wie bei mehreren PLZ (run_batch)
+        ergebnis = suche(params["plz"][0], params["radius"], params["ptv"], params["pta"], params["pts"],
+                         min_treffer=0)
+        daten, schedules, anrufplan = ergebnis.arzt_praxis_daten, ergebnis.schedules, ergebnis.anrufplan
+    else:
+        daten, fehler = run_batch(params["plz"], params["ptv"], params["pta"], params["pts"], params["radius"])
+        if fehler and len(fehler) == len(params["plz"]):
+            raise RuntimeError("; ".join(f"PLZ {plz}: {msg}" for plz, msg in fehler.items()))
+        schedules, anrufplan = build_schedules(daten), None
+    messwerte["suche_s"] = round(time.perf_counter() - start, 3)
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = _jetzt().strftime("%Y-%m-%d")
+    dateien = []
+    for fmt in params["formate"]:
+        start = time.perf_counter()
+        path = os.path.join(out_dir, f"{params['name']}_{stamp}{EXPORTER[fmt].suffix}")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(export_bytes(fmt, daten, schedules, anrufplan=anrufplan))
+        os.replace(tmp, path)  # Leser sehen nie eine halb geschriebene Datei
+        messwerte[f"{fmt}_s"] = round(time.perf_counter() - start, 3)
+        dateien.append(path)
+    return {"praxen": len(daten), "messwerte": messwerte, "dateien": dateien}
+
+
+def run_worker(queue: JobQueue, out_dir: str, max_workers: int = 2, interval: float = 30, once: bool = False) -> None:
+    """Scheduler + Job-Ausführung; ``once``: nur bis alle fälligen Jobs erledigt sind."""
+    zurueck = queue.abgebrochene_zuruecksetzen()
+    if zurueck:
+        logger.info("%d abgebrochene Job(s) wieder eingereiht", zurueck)
+
+    laufend = {}  # Future -> Job-id
+    # "spawn": die Pool-Prozesse erben keine Threads/Locks des Hauptprozesses
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            neu = queue.faellige_einplanen()
+            if neu:
+                logger.info("%d Job(s) eingeplant", neu)
+            for job_id, params in queue.abholen(max_workers - len(laufend)):
+                logger.info("Job %d (%s) gestartet", job_id, params["name"])
+                laufend[pool.submit(run_job, params, out_dir)] = job_id
+
+            for future in [f for f in laufend if f.done()]:
+                job_id = laufend.pop(future)
+                try:
+                    ergebnis = future.result()
+                except Exception as e:
+                    logger.warning("Job %d fehlgeschlagen: %s", job_id, e)
+                    queue.abschliessen(job_id, fehler=f"{type(e).__name__}: {e}")
+                else:
+                    logger.info("Job %d fertig: %d Praxen, %s", job_id, ergebnis["praxen"], ergebnis["messwerte"])
+                    queue.abschliessen(job_id, ergebnis)
+
+            if once and not laufend and not queue.hat_wartende():
+                return
+            time.sleep(0.2 if laufend or once else interval)
+
+
+def main(argv=None) -> int:
+    from arztsuche.export import EXPORTER
+
+    parser = argparse.ArgumentParser(description="Gespeicherte 116117-Suchen nach Zeitplan ausführen.")
+    parser.add_argument("--db", default=os.environ.get("ARZTSUCHE_JOBS_DB", DEFAULT_DB), help="Job-Datenbank (SQLite)")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    add = sub.add_parser("add", help="Suche speichern (bzw. ändern)")
+    add.add_argument("name")
+    add.add_argument("--plz", nargs="+", required=True)
+    add.add_argument("--radius", type=float, default=25, help="Suchradius in km (Standard: 25)")
+    add.add_argument("--verfahren", choices=sorted(verfahren_options.values()), default="A")
+    add.add_argument("--altersgruppe", choices=sorted(altersgruppe_options.values()), default="E")
+    add.add_argument("--setting", choices=sorted(setting_options.values()), default="E")
+    add.add_argument("--uhrzeit", default="06:00", help="täglich ab dieser Uhrzeit (HH:MM, Europe/Berlin)")
+    add.add_argument("--format", nargs="+", choices=sorted(EXPORTER), default=["xlsx"])
+
+    for befehl, hilfe in (("enable", "Suche aktivieren"), ("disable", "Suche deaktivieren"),
+                          ("enqueue", "Suche sofort einplanen")):
+        sub.add_parser(befehl, help=hilfe).add_argument("name")
+    sub.add_parser("list", help="gespeicherte Suchen anzeigen")
+    jobs = sub.add_parser("jobs", help="letzte Jobs anzeigen")
+    jobs.add_argument("--limit", type=int, default=20)
+
+    run = sub.add_parser("run", help="Worker starten")
+    run.add_argument("--out", default=os.environ.get("ARZTSUCHE_EXPORT_DIR", DEFAULT_OUT), help="Ausgabeverzeichnis")
+    run.add_argument("--workers", type=int, default=2, help="parallele Jobs (Prozesse, Standard: 2)")
+    run.add_argument("--interval", type=float, default=30, help="Sekunden zwischen zwei Prüfungen (Standard: 30)")
+    run.add_argument("--once", action="store_true", help="nur fällige Jobs abarbeiten und beenden")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    queue = JobQueue(args.db)
+
+    if args.befehl == "add":
+        try:
+            # normalisiert ("6:30" -> "06:30"), da faellige_einplanen als Text vergleicht
+            uhrzeit = datetime.strptime(args.uhrzeit, "%H:%M").strftime("%H:%M")
+        except ValueError:
+            parser.error("--uhrzeit bitte als HH:MM angeben.")
+        unavailable = [fmt for fmt in args.format if not EXPORTER[fmt].available()]
+        if unavailable:
+            parser.error(f"Format(e) nicht verfügbar (fehlende Abhängigkeit): {', '.join(unavailable)}")
+        queue.speichere_suche(args.name, args.plz, args.radius, args.verfahren, args.altersgruppe,
+                              args.setting, args.format, uhrzeit)
+    elif args.befehl in ("enable", "disable"):
+        if not queue.setze_aktiv(args.name, args.befehl == "enable"):
+            parser.error(f"Unbekannte Suche: {args.name}")
+    elif args.befehl == "enqueue":
+        job_id = queue.einplanen(args.name)
+        if job_id is None:
+            parser.error(f"Unbekannte Suche: {args.name}")
+        print(job_id)
+    elif args.befehl == "list":
+        for name, plz, radius, ptv, pta, pts, formate, uhrzeit, aktiv, zuletzt in queue.suchen():
+            print(f"{name}\t{plz}\t{radius:g} km\t{ptv}/{pta}/{pts}\t{formate}\t{uhrzeit}"
+                  f"\t{'aktiv' if aktiv else 'inaktiv'}\t{zuletzt or '-'}")
+    elif args.befehl == "jobs":
+        for job_id, name, status, angelegt, dauer, praxen, dateien, fehler in queue.jobs(args.limit):
+            zeit = datetime.fromtimestamp(angelegt, ZoneInfo("Europe/Berlin")).strftime("%d.%m.%Y %H:%M")
+            detail = fehler or ", ".join(json.loads(dateien or "[]"))
+            dauer = f"{dauer:.1f} s" if dauer is not None else "-"
+            print(f"{job_id}\t{name}\t{status}\t{zeit}\t{dauer}\t{praxen if praxen is not None else '-'}\t{detail}")
+    else:
+        # Gemeinsamer Disk-Cache für alle Pool-Prozesse (Kindprozesse erben die Umgebung)
+        os.environ.setdefault("ARZTSUCHE_CACHE_DB",
+                              os.path.join(os.path.dirname(os.path.abspath(args.db)), "cache.sqlite"))
+        try:
+            run_worker(queue, args.out, max_workers=args.workers, interval=args.interval, once=args.once)
+        except KeyboardInterrupt:
+            logger.info("Worker beendet")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Benchmarks mit lokalem Ersatz für die 116117-API."""
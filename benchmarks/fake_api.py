@@ -0,0 +1,111 @@
+"""Lokaler Ersatz für ``arztsuche.116117.de/api/data`` mit synthetischen Praxen.
+
+Standalone, z.B. um die Streamlit-App dagegen laufen zu lassen::
+
+    python -m benchmarks.fake_api --practices 1000 --port 8765
+    ARZTSUCHE_API_URL=http://127.0.0.1:8765/api/data streamlit run 116117-Arztsuche-Psychotherapie-Exporter.py
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TAGE = ["Mo.", "Di.", "Mi.", "Do.", "Fr.", "Sa.", "So."]
+NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann"]
+ORTE = ["Berlin", "Hamburg", "München", "Köln", "Leipzig", "Dresden", "Bremen", "Kassel"]
+
+
+def _zeit(rng: random.Random) -> str:
+    start = rng.randrange(7 * 60, 17 * 60, 15)
+    end = start + rng.choice((30, 45, 60, 90, 120))
+    return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+
+
+def synthetic_practice(i: int, rng: random.Random, lat: float = 52.52, lon: float = 13.40) -> dict:
+    """Eine Praxis mit realistischer ``tsz``-Struktur (Sprechzeiten + Telefonzeiten, teils mehrere Intervalle)."""
+    tsz = []
+    for tag in rng.sample(TAGE[:5], rng.randint(2, 5)) + (["Sa."] if rng.random() < 0.05 else []):
+        telefon = [{"zeit": _zeit(rng)} for _ in range(rng.choice((1, 1, 1, 2)))]
+        if rng.random() < 0.15:
+            telefon.append({"zeit": f"{_zeit(rng)};{_zeit(rng)}"})
+        if rng.random() < 0.01:
+            telefon.append({"zeit": "nach Vereinbarung"})
+        tsz.append({"t": tag, "d": "", "tszDesTyps": [
+            {"typ": "Sprechzeiten", "sprechzeiten": [{"zeit": "08:00-12:00"}, {"zeit": "14:00-18:00"}]},
+            {"typ": "Telefonische Erreichbarkeit", "sprechzeiten": telefon},
+        ]})
+    d_lat, d_lon = rng.uniform(-0.9, 0.9), rng.uniform(-1.4, 1.4)
+    return {
+        "id": f"fake-{i:06d}",
+        "name": f"Dipl.-Psych. {rng.choice(NACHNAMEN)} {i}",
+        "tel": f"0{rng.randint(30, 999)} {rng.randint(100000, 9999999)}",
+        "geschlecht": rng.choice(("W", "M")),
+        "strasse": "Hauptstraße",
+        "hausnummer": rng.choice((str(rng.randint(1, 200)), f"{rng.randint(1, 50)}-{rng.randint(51, 99)}", "12 a")),
+        "plz": f"{rng.randint(1067, 99998):05d}",
+        "ort": rng.choice(ORTE),
+        "email": "",
+        "web": "",
+        "lat": lat + d_lat,
+        "lon": lon + d_lon,
+        "distance": int(((d_lat * 111_000) ** 2 + (d_lon * 68_000) ** 2) ** 0.5),
+        "tsz": tsz,
+    }
+
+
+def synthetic_payload(n: int, seed: int = 116117) -> dict:
+    rng = random.Random(seed)
+    praxen = sorted((synthetic_practice(i, rng) for i in range(n)), key=lambda a: a["distance"])
+    return {"arztPraxisDatas": praxen}
+
+
+class FakeApi:
+    """HTTP-Server in einem Hintergrund-Thread; liefert immer dieselbe vorberechnete Antwort."""
+
+    def __init__(self, practices: int, host: str = "127.0.0.1", port: int = 0):
+        body = json.dumps(synthetic_payload(practices)).encode("utf-8")
+        stats = self.stats = {"requests": 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stats["requests"] += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.payload_bytes = len(body)
+        self.url = f"http://{host}:{self.server.server_port}/api/data"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Lokaler Ersatz für die 116117-API.")
+    parser.add_argument("--practices", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    with FakeApi(args.practices, port=args.port) as api:
+        print(f"Fake-API mit {args.practices} Praxen unter {api.url} (Strg+C beendet)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
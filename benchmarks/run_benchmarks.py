@@ -0,0 +1,156 @@
+"""Benchmark-Suite: Suche Ende-zu-Ende, Telefonzeit-Auswertung, Excel-Export, PLZ-Lookup.
+
+Aufruf::
+
+    python -m benchmarks.run_benchmarks                 # JSON nach stdout
+    python -m benchmarks.run_benchmarks -o bench.json --sizes 10 100
+
+Das Ergebnis ist maschinenlesbar (eine Zeile pro Messung in ``results``), damit
+Läufe verschiedener Versionen direkt verglichen werden können.
+
+``search_end_to_end`` misst den Suchpfad der App (:func:`arztsuche.search.suche`)
+gegen die lokale Fake-API, jeweils mit leerem Gitter-Index und leeren Caches.
+Disk-Cache und Praxis-Datenbank (``ARZTSUCHE_CACHE_DB``/``ARZTSUCHE_DB``) bleiben
+dabei außen vor.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from arztsuche import api as api_module
+from arztsuche import search as search_module
+from arztsuche.anrufplan import build_anrufplan
+from arztsuche.api import ApiClient
+from arztsuche.cache import get_response_cache
+from arztsuche.export import workbook_bytes
+from arztsuche.plz_index import DEFAULT_CSV_PATH, PlzIndex, get_plz_index
+from arztsuche.schedule import build_schedules, is_reachable_now, next_available_windows
+from arztsuche.spatial import spatial_index
+from benchmarks.fake_api import FakeApi, synthetic_payload
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+# Fester Zeitpunkt (Montag, 10:17) -> reproduzierbare Ergebnisse
+NOW = datetime(2025, 3, 3, 10, 17, tzinfo=ZoneInfo("Europe/Berlin"))
+
+
+def measure(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"repeat": repeat, "min_s": min(times), "median_s": statistics.median(times), "max_s": max(times)}
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _repeat_for(n: int) -> int:
+    return 20 if n <= 100 else 5 if n <= 1000 else 2
+
+
+def bench_size(n: int) -> list[dict]:
+    results = []
+    repeat = _repeat_for(n)
+    with FakeApi(n) as api:
+        # Der prozessweite Client zeigt für die Dauer des Laufs auf die Fake-API
+        client_vorher = api_module._client
+        api_module._client = ApiClient(url=api.url, retries=0)
+
+        def search():
+            # Kalt wie eine neue Region: Gitter-Index, Antwort- und Ergebnis-Cache leeren
+            spatial_index.clear()
+            get_response_cache().clear()
+            search_module._ergebnis_cache().clear()
+            ergebnis = search_module.suche("10115", 100, "V", "E", "E", min_treffer=0)
+            ergebnis.window_table.reachable_mask(NOW)
+            ergebnis.window_table.next_windows(ergebnis.arzt_praxis_daten, NOW, k=5)
+            return ergebnis
+
+        try:
+            ergebnis = search()  # Aufwärmen (Verbindung, Imports)
+            results.append({"benchmark": "search_end_to_end", "practices": n,
+                            "payload_bytes": api.payload_bytes, **measure(search, repeat)})
+        finally:
+            api_module._client = client_vorher
+
+    daten, schedules, table = ergebnis.arzt_praxis_daten, ergebnis.schedules, ergebnis.window_table
+    # Die Zeilen der PraxisTabelle tragen kein "tsz" mehr -> Telefonzeiten aus den Rohdaten auswerten
+    roh = synthetic_payload(n)["arztPraxisDatas"]
+    results.append({"benchmark": "build_schedules", "practices": n, **measure(lambda: build_schedules(roh), repeat)})
+    results.append({"benchmark": "is_reachable_now", "practices": n,
+                    **measure(lambda: [is_reachable_now(s, NOW) for s in schedules], repeat)})
+    results.append({"benchmark": "next_available_windows", "practices": n,
+                    **measure(lambda: next_available_windows(daten, schedules, NOW, 5), repeat)})
+    results.append({"benchmark": "engine_reachable_mask", "practices": n, **measure(lambda: table.reachable_mask(NOW), repeat)})
+    results.append({"benchmark": "engine_next_windows", "practices": n, **measure(lambda: table.next_windows(daten, NOW, 5), repeat)})
+    results.append({"benchmark": "anrufplan", "practices": n, **measure(lambda: build_anrufplan(daten, schedules), repeat)})
+    results.append({"benchmark": "workbook", "practices": n,
+                    "peak_bytes": peak_memory(lambda: workbook_bytes(daten, schedules)),
+                    **measure(lambda: workbook_bytes(daten, schedules), repeat)})
+    return results
+
+
+def bench_plz() -> list[dict]:
+    index = get_plz_index()
+    plzs = [index.with_prefix(str(d)) for d in range(10)]
+    sample = [p for group in plzs for p in group[:100]]
+    return [
+        {"benchmark": "plz_index_load", "entries": len(index), **measure(lambda: PlzIndex(DEFAULT_CSV_PATH), 5)},
+        {"benchmark": "plz_lookup", "lookups": len(sample),
+         **measure(lambda: [get_plz_index().lookup(p) for p in sample], 20)},
+    ]
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks für den 116117-Exporter.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Anzahl Praxen je Lauf")
+    parser.add_argument("-o", "--output", help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args(argv)
+
+    # Nur In-Memory-Caches: die Benchmarks leeren sie und sollen keine echten Dateien anfassen
+    os.environ.pop("ARZTSUCHE_CACHE_DB", None)
+    os.environ.pop("ARZTSUCHE_DB", None)
+    results = bench_plz()
+    for n in args.sizes:
+        print(f"… {n} Praxen", file=sys.stderr)
+        results.extend(bench_size(n))
+
+    report = {
+        "created": datetime.now(ZoneInfo("Europe/Berlin")).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,69 @@
+import pydeck as pdk
 import streamlit as st
 
-st.title("Alle Kontakte in einer map")
+from arztsuche.karte import MAX_ZOOM, MIN_ZOOM, karten_index
+
+st.title("🗺️ Alle Kontakte auf einer Karte")
+
+ergebnis = st.session_state.get("ergebnis")
+if not ergebnis:
+    st.info("Bitte zuerst auf der Startseite nach Psychotherapeut*innen suchen – die Karte zeigt dann alle Treffer.")
+    st.stop()
+
+praxen = ergebnis.arzt_praxis_daten
+index = karten_index(praxen)
+if len(index) == 0:
+    st.warning("Für keine der gefundenen Praxen ist ein Standort bekannt.")
+    st.stop()
+
+# Clustering passiert serverseitig je Zoomstufe -> nur wenige Marker gehen an den Browser
+zoom = st.slider("Zoomstufe", MIN_ZOOM, MAX_ZOOM, value=index.start_zoom(ergebnis.radius_km))
+stufe = index.stufe(zoom)
+
+
+def _tooltip(k: int) -> str:
+    mitglieder = stufe.mitglieder(k)
+    if len(mitglieder) == 1:
+        a = praxen[int(mitglieder[0])]
+        adresse = f"{a.get('strasse', '')} {a.get('hausnummer', '')}, {a.get('plz', '')} {a.get('ort', '')}"
+        return f"{a.get('name', '')}\nTel: {a.get('tel', '')}\n{adresse}"
+    namen = [praxen[int(i)].get("name", "") for i in mitglieder[:3]]
+    rest = f"\n… und {len(mitglieder) - 3} weitere" if len(mitglieder) > 3 else ""
+    return f"{len(mitglieder)} Praxen\n" + "\n".join(namen) + rest
+
+
+marker = [{
+    "lat": float(stufe.lat[k]),
+    "lon": float(stufe.lon[k]),
+    "anzahl": int(stufe.anzahl[k]),
+    "label": str(int(stufe.anzahl[k])) if stufe.anzahl[k] > 1 else "",
+    "radius": 8 + 4 * min(6, int(stufe.anzahl[k]).bit_length()),
+    "text": _tooltip(k),
+} for k in range(len(stufe))]
+
+lat, lon = index.mitte()
+st.pydeck_chart(pdk.Deck(
+    layers=[
+        pdk.Layer(
+            "ScatterplotLayer", marker,
+            get_position=["lon", "lat"], get_radius="radius", radius_units="pixels",
+            get_fill_color=[0, 112, 192, 180], get_line_color=[255, 255, 255], stroked=True,
+            pickable=True,
+        ),
+        pdk.Layer(
+            "TextLayer", [m for m in marker if m["label"]],
+            get_position=["lon", "lat"], get_text="label", get_size=14,
+            get_color=[255, 255, 255], get_alignment_baseline="'center'",
+        ),
+    ],
+    initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=zoom),
+    tooltip={"text": "{text}"},
+    map_style=None,
+))
+
+st.caption(f"{len(index)} von {len(praxen)} Praxen in {len(marker)} Markern (Zoomstufe {zoom}).")
+geschaetzt = index.geschaetzt()
+if geschaetzt:
+    st.caption(f"📍 Bei {geschaetzt} Praxen ist der Standort aus Adresse bzw. PLZ geschätzt.")
+if len(index) < len(praxen):
+    st.caption(f"⚠️ {len(praxen) - len(index)} Praxen ohne bekannten Standort werden nicht angezeigt.")
@@ -1,3 +1,58 @@
 import streamlit as st
+from datetime import date, timedelta
 
-st.title("Hier stehen Sie auf der Warteliste")
+from arztsuche.kontakte import STATUS_OPTIONEN, KontaktStore, get_kontakt_store, nachweis_bytes
+
+st.title("📋 Hier stehen Sie auf der Warteliste")
+
+# Gleicher Store wie die Anrufliste: dauerhaft mit ARZTSUCHE_KONTAKTE_DB, sonst nur für diese Session
+kontakt_store = get_kontakt_store()
+if kontakt_store is None:
+    if "kontakt_store" not in st.session_state:
+        st.session_state["kontakt_store"] = KontaktStore()
+    kontakt_store = st.session_state["kontakt_store"]
+
+warteliste = kontakt_store.warteliste()
+if not warteliste:
+    st.info("Noch keine Praxis mit dem Status „Auf Warteliste“. Den Status setzt du auf der Seite Tages-Telefonkontakte.")
+else:
+    st.caption(f"{len(warteliste)} Praxis/Praxen")
+    st.dataframe(
+        [{k: v for k, v in eintrag.items() if k != "praxis_id"} for eintrag in warteliste],
+        use_container_width=True, hide_index=True,
+    )
+
+    with st.form("status_aendern"):
+        st.markdown("**Status ändern**")
+        auswahl = st.selectbox(
+            "Praxis", range(len(warteliste)),
+            format_func=lambda i: f'{warteliste[i]["Praxis"]} ({warteliste[i]["Telefon"]})',
+        )
+        neuer_status = st.selectbox("Neuer Status", STATUS_OPTIONEN + ["Platz erhalten", "Von Warteliste gestrichen"])
+        notiz = st.text_input("Notiz", placeholder="z.B. Rückruf vereinbart")
+        if st.form_submit_button("Speichern"):
+            eintrag = warteliste[auswahl]
+            kontakt_store.setze(eintrag["praxis_id"], neuer_status, notiz, name=eintrag["Praxis"], tel=eintrag["Telefon"])
+            st.rerun()
+
+# ===========================
+# NACHWEIS FÜR DIE KRANKENKASSE
+# ===========================
+st.markdown("---")
+st.subheader("🧾 Nachweis für die Krankenkasse")
+st.caption("Alle bearbeiteten Kontaktversuche im Zeitraum – je Praxis und Tag der letzte Stand.")
+
+bis = date.today()
+zeitraum = st.date_input("Zeitraum", value=(bis - timedelta(days=90), bis), max_value=bis)
+if isinstance(zeitraum, tuple) and len(zeitraum) == 2:
+    von, bis = zeitraum
+    zeilen = kontakt_store.nachweis(von, bis)
+    st.write(f"{len(zeilen)} Kontaktversuch(e) vom {von:%d.%m.%Y} bis {bis:%d.%m.%Y}")
+    if zeilen:
+        st.download_button(
+            "📥 Nachweis als Excel-Datei herunterladen",
+            data=lambda: nachweis_bytes(zeilen, f"{von:%d.%m.%Y}", f"{bis:%d.%m.%Y}"),
+            file_name=f"nachweis_therapieplatzsuche_{von}_{bis}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore",
+        )
@@ -0,0 +1,57 @@
+import streamlit as st
+
+from arztsuche.api import altersgruppe_options, setting_options, verfahren_options
+from arztsuche.batch import resolve_plzs, run_batch
+from arztsuche.export import available_exporters, export_bytes
+from arztsuche.schedule import build_schedules
+
+MAX_PLZ = 50  # öffentliche Seite: größere Bereiche bitte über die CLI (python -m arztsuche.batch)
+
+st.title("📦 Sammelexport für mehrere PLZ")
+st.markdown("Mehrere Postleitzahlen (oder ein ganzer PLZ-Bereich) in **einer** Datei (Excel, CSV, Parquet, JSON oder Kalender) – doppelte Praxen werden zusammengeführt.")
+
+plz_text = st.text_area("Postleitzahlen (durch Komma, Leerzeichen oder Zeilenumbruch getrennt)", placeholder="10115, 10117, 10119")
+prefix = st.text_input("oder PLZ-Bereich (Präfix, z.B. 101)", max_chars=5)
+
+radius_selection = st.selectbox("Suchradius (in km)", [5, 10, 25, 50, 100], index=1)
+verfahren_selection = st.selectbox("Verfahren", list(verfahren_options.keys()), index=0)
+altersgruppe_selection = st.selectbox("Altersgruppe", list(altersgruppe_options.keys()), index=0)
+setting_selection = st.selectbox("Setting", list(setting_options.keys()), index=0)
+
+if st.button("🔎 Sammelexport starten"):
+    plzs = resolve_plzs(plz_text.replace(",", " ").split(), prefix or None)
+    if not plzs:
+        st.warning("Bitte gib mindestens eine Postleitzahl oder einen PLZ-Bereich ein.")
+    elif len(plzs) > MAX_PLZ:
+        st.error(f"❌ {len(plzs)} PLZ sind zu viele – hier sind höchstens {MAX_PLZ} auf einmal möglich. "
+                 "Bitte wähle einen längeren PLZ-Präfix oder teile die Liste auf.")
+    else:
+        progress_bar = st.progress(0.0, text=f"{len(plzs)} PLZ werden abgefragt …")
+        arzt_praxis_daten, fehler = run_batch(
+            plzs,
+            verfahren_options[verfahren_selection],
+            altersgruppe_options[altersgruppe_selection],
+            setting_options[setting_selection],
+            radius_selection,
+            on_progress=lambda plz, n, total: progress_bar.progress(n / total, text=f"PLZ {plz} fertig ({n}/{total})"),
+        )
+        for plz, msg in fehler.items():
+            st.warning(f"PLZ {plz}: {msg}")
+        progress_bar.progress(1.0, text="Telefonzeiten werden ausgewertet …")
+        # Nur das Ergebnis merken – die Dateien entstehen erst beim Download
+        st.session_state["sammelexport"] = (arzt_praxis_daten, build_schedules(arzt_praxis_daten))
+        st.session_state["sammelexport_info"] = f"{len(arzt_praxis_daten)} Praxen aus {len(plzs)} PLZ"
+
+if st.session_state.get("sammelexport"):
+    st.success(st.session_state["sammelexport_info"])
+    arzt_praxis_daten, schedules = st.session_state["sammelexport"]
+    for spalte, e in zip(st.columns(len(available_exporters())), available_exporters()):
+        with spalte:
+            st.download_button(
+                f"📥 {e.label}",
+                data=lambda fmt=e.name: export_bytes(fmt, arzt_praxis_daten, schedules),
+                file_name=f"116117_sammelexport{e.suffix}",
+                mime=e.mime,
+                key=f"sammelexport_{e.name}",
+                on_click="ignore",
+            )